@@ -5,6 +5,7 @@ from .customer_admin import *
 from .lineitem_admin import *
 from .seller_admin import *
 from .item_admin import *
+from .failed_payload_admin import *
 
 # Customize admin site titles
 admin.site.site_header = "GCI Administration"
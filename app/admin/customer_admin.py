@@ -4,6 +4,7 @@ from django.urls import reverse
 from django.utils.html import format_html
 from django import forms
 from app.models import Customer
+from app.services import search_index
 from django.contrib.admin.widgets import AutocompleteSelect
 
 #TODO: Implement advanced search form for Customer admin
@@ -30,22 +31,19 @@ class CustomerAdmin(admin.ModelAdmin):
 
     def get_search_results(self, request, queryset, search_term):
         """
-        Enhance search: support suggestions for partial matches.
+        Match every word of the term as a prefix of the name, email or
+        phone, from the full-text index instead of scanning the table.
         """
-        queryset, use_distinct = super().get_search_results(request, queryset, search_term)
-
-        if search_term:
-            queryset |= self.model.objects.filter(name__icontains=search_term)
-            queryset |= self.model.objects.filter(email__icontains=search_term)
-            queryset |= self.model.objects.filter(phone_number__icontains=search_term)
-
-        return queryset, use_distinct
+        if not search_term.strip():
+            return queryset, False
+        return queryset.filter(search_index.customer_filter(search_term)), False
 
     def invoice_count(self, obj):
-        return obj.invoices.count()
+        return obj.invoice_count
 
     def view_invoices(self, obj):
         url = reverse("admin:app_invoice_changelist") + f"?customer__id__exact={obj.id}"
         return format_html(f"<a href='{url}'>View invoices</a>")
 
-    invoice_count.short_description = "Invoices"
\ No newline at end of file
+    invoice_count.short_description = "Invoices"
+    invoice_count.admin_order_field = "invoice_count"
\ No newline at end of file
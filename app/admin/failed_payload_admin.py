@@ -0,0 +1,13 @@
+from __future__ import annotations
+from django.contrib import admin
+from app.models import FailedInvoicePayload
+
+
+@admin.register(FailedInvoicePayload)
+class FailedInvoicePayloadAdmin(admin.ModelAdmin):
+    search_fields = ("invoice_number", "uuid")
+    list_display = ("invoice_number", "uuid", "attempts", "first_failed_at", "last_failed_at")
+    readonly_fields = ("uuid", "invoice_number", "payload", "error", "attempts", "first_failed_at", "last_failed_at")
+
+    def has_add_permission(self, request):
+        return False
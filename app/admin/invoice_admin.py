@@ -4,7 +4,8 @@ from django.forms import BaseInlineFormSet
 from django.utils.html import format_html
 from django.shortcuts import redirect
 
-from app.models import Invoice, InvoiceLineItem
+from app.models import Invoice, InvoiceLineItem, InvoiceNumberSequence
+from app.services import search_index
 
 
 class LineItemInlineFormSet(BaseInlineFormSet):
@@ -88,7 +89,7 @@ class InvoiceAdmin(admin.ModelAdmin):
     list_select_related = ("customer", "seller")
     date_hierarchy = "issue_date"
 
-    hidden_fields = {"uuid", "xml", "qr_base64", "qr_image"}
+    hidden_fields = {"uuid", "xml", "qr_code"}
 
     readonly_fields = (
         "subtotal",
@@ -134,15 +135,32 @@ class InvoiceAdmin(admin.ModelAdmin):
         }),
     )
 
+    def get_search_results(self, request, queryset, search_term):
+        # Number, notes, line descriptions and customer, from the full-text index.
+        if not search_term.strip():
+            return queryset, False
+        return queryset.filter(search_index.invoice_filter(search_term)), False
+
+    def save_related(self, request, form, formsets, change):
+        # Saving N inline lines would otherwise recalculate totals and
+        # loyalty N times; do it once after all lines are written.
+        with Invoice.deferred_totals(form.instance):
+            super().save_related(request, form, formsets, change)
+
     def get_changeform_initial_data(self, request):
-        return {"invoice_number": Invoice.generate_next_invoice_number()}
+        # A preview only; the number is reserved when a blank field is saved.
+        return {"invoice_number": InvoiceNumberSequence.peek()}
 
     def qr_preview(self, obj):
-        if not obj or not obj.qr_image:
+        if not obj or not obj.qr_code:
             return "-"
+        try:
+            image = obj.qr_code.ensure_image()
+        except ValueError:
+            return "Invalid QR data"
         return format_html(
             '<img src="{}" style="height:120px; border:1px solid #ddd; padding:4px; background:#fff;" />',
-            obj.qr_image.url,
+            image.url,
         )
 
     qr_preview.short_description = "QR Image"
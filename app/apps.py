@@ -5,3 +5,9 @@ class AppConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "app"
     verbose_name = "GCI Billing App"
+
+    def ready(self):
+        # Registers the database system checks, and connects the signal
+        # handlers that keep the search index current.
+        from app import checks  # noqa: F401
+        from app.services import search_index  # noqa: F401
@@ -0,0 +1,112 @@
+"""System checks for the database configuration (see docs/database-setup.md)."""
+from __future__ import annotations
+
+from django.conf import settings
+from django.core.checks import Error, Tags, Warning, register
+from django.db import DatabaseError, connections
+
+SQLITE_ENGINE = "django.db.backends.sqlite3"
+POSTGRES_ENGINE = "django.db.backends.postgresql"
+# Oldest PostgreSQL release supported by Django 5.2.
+POSTGRES_MIN_VERSION = 140000
+
+
+def database_config_messages(alias, config) -> list:
+    """Problems with one ``DATABASES`` entry that can be seen without connecting."""
+    engine = config.get("ENGINE")
+    if engine not in {SQLITE_ENGINE, POSTGRES_ENGINE}:
+        return [
+            Error(
+                f"Database {alias!r} uses {engine!r}.",
+                hint="Set DATABASE_URL to a sqlite:// or postgres:// URL.",
+                id="app.E001",
+            )
+        ]
+    if engine == SQLITE_ENGINE:
+        return []
+
+    messages = []
+    options = config.get("OPTIONS", {})
+    pool = options.get("pool")
+    if pool:
+        if config.get("CONN_MAX_AGE"):
+            messages.append(
+                Error(
+                    f"Database {alias!r} pools connections but CONN_MAX_AGE is {config['CONN_MAX_AGE']}.",
+                    hint="Pooled connections require CONN_MAX_AGE = 0; set DB_POOL=False to use persistent connections.",
+                    id="app.E002",
+                )
+            )
+        try:
+            import psycopg_pool  # noqa: F401
+        except ImportError:
+            messages.append(
+                Error(
+                    f"Database {alias!r} pools connections but psycopg_pool is not installed.",
+                    hint='Install "psycopg[pool]", or set DB_POOL=False.',
+                    id="app.E003",
+                )
+            )
+        if isinstance(pool, dict) and pool.get("min_size", 4) > pool.get("max_size", pool.get("min_size", 4)):
+            messages.append(
+                Error(
+                    f"Database {alias!r} pool min_size is larger than max_size.",
+                    hint="Check DB_POOL_MIN_SIZE and DB_POOL_MAX_SIZE.",
+                    id="app.E004",
+                )
+            )
+    if "statement_timeout" not in options.get("options", ""):
+        messages.append(
+            Warning(
+                f"Database {alias!r} has no statement_timeout.",
+                hint="A runaway query will hold its connection until it finishes; set DB_STATEMENT_TIMEOUT_MS.",
+                id="app.W001",
+            )
+        )
+    return messages
+
+
+@register()
+def check_database_config(app_configs=None, **kwargs):
+    messages = []
+    for alias, config in settings.DATABASES.items():
+        messages.extend(database_config_messages(alias, config))
+    return messages
+
+
+@register(deploy=True)
+def check_production_database(app_configs=None, **kwargs):
+    if settings.DATABASES["default"]["ENGINE"] != SQLITE_ENGINE:
+        return []
+    return [
+        Warning(
+            "The default database is SQLite.",
+            hint=(
+                "SQLite allows one writer at a time, so web workers queue behind each other. "
+                "Set DATABASE_URL to a PostgreSQL database for multi-worker deployments."
+            ),
+            id="app.W002",
+        )
+    ]
+
+
+@register(Tags.database)
+def check_database_server(app_configs=None, databases=None, **kwargs):
+    """Connect to each checked database; runs with ``manage.py check --database default``."""
+    messages = []
+    for alias in databases or []:
+        connection = connections[alias]
+        try:
+            connection.ensure_connection()
+        except DatabaseError as e:
+            messages.append(Error(f"Cannot connect to database {alias!r}: {e}", id="app.E005"))
+            continue
+
+        if connection.vendor == "postgresql" and connection.pg_version < POSTGRES_MIN_VERSION:
+            messages.append(
+                Error(
+                    f"Database {alias!r} runs PostgreSQL {connection.pg_version}; 14 or newer is required.",
+                    id="app.E006",
+                )
+            )
+    return messages
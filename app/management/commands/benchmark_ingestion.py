@@ -0,0 +1,83 @@
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from app.management.commands.fetch_invoices import Command as FetchInvoicesCommand
+from app.services.jofotara_standin import JofotaraStandin, StandinConfig
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark fetch_invoices end to end against the local JOFotara stand-in. "
+        "Runs against a throwaway test database, never the configured one."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--invoices", type=int, default=1000)
+        parser.add_argument("--page-size", type=int, default=50)
+        parser.add_argument("--lines", type=int, default=3)
+        parser.add_argument("--customers", type=int, default=50)
+        parser.add_argument("--list-latency-ms", type=int, default=20)
+        parser.add_argument(
+            "--error-rate",
+            type=float,
+            default=0.0,
+            help="Share of requests answered with 503 + Retry-After (0-1).",
+        )
+        parser.add_argument("--detail-latency-ms", type=int, default=20)
+        parser.add_argument("--workers", type=int, default=8)
+        parser.add_argument(
+            "--fetch-arg",
+            action="append",
+            default=[],
+            help="Extra fetch_invoices argument, e.g. --fetch-arg=--max-in-flight=32.",
+        )
+
+    def handle(self, *args, **options):
+        config = StandinConfig(
+            invoices=options["invoices"],
+            page_size=options["page_size"],
+            lines_per_invoice=options["lines"],
+            customers=options["customers"],
+            list_latency_ms=options["list_latency_ms"],
+            detail_latency_ms=options["detail_latency_ms"],
+            error_rate=options["error_rate"],
+        )
+
+        with tempfile.TemporaryDirectory() as tmp, JofotaraStandin(config) as standin:
+            if connection.vendor == "sqlite":
+                # Benchmark on a real file so commit/fsync cost is measured.
+                connection.settings_dict.setdefault("TEST", {})["NAME"] = os.path.join(tmp, "bench.sqlite3")
+            old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+            try:
+                fetch = FetchInvoicesCommand()
+                call_command(
+                    fetch,
+                    *options["fetch_arg"],
+                    workers=options["workers"],
+                    base_url=standin.url,
+                    full=True,
+                    no_archive=True,
+                    stdout=StringIO(),
+                    stderr=StringIO(),
+                )
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        summary = fetch.stats.summary()
+        self.stdout.write(
+            f"Invoices:             {summary['invoices']} / {config.invoices}\n"
+            f"Elapsed:              {summary['elapsed_s']:.2f}s\n"
+            f"Throughput:           {summary['invoices_per_s']:.1f} invoices/s\n"
+            f"Detail latency p50:   {summary['detail_p50_ms']:.1f} ms\n"
+            f"Detail latency p99:   {summary['detail_p99_ms']:.1f} ms\n"
+            f"DB write time:        {summary['db_write_s']:.2f}s "
+            f"({summary['db_write_per_invoice_ms']:.2f} ms/invoice, {summary['db_batches']} batches)\n"
+            f"Fetch throughput:     {summary['fetched_per_s']:.1f} invoices/s\n"
+            f"Write throughput:     {summary['written_per_db_s']:.1f} invoices/DB-s\n"
+            f"Queue depth avg/max:  {summary['queue_depth_avg']:.1f} / {summary['queue_depth_max']}"
+        )
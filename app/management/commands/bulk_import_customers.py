@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from app.services.customer_import import bulk_import_customers, read_customer_rows
+
+
+class Command(BaseCommand):
+    help = "Import customers from a CSV (with a header row) or JSON Lines file"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File ending in .csv or .jsonl.")
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Customers validated and inserted per transaction (default: 1000).",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Validate only; do not insert anything.",
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"➡️ Importing customers from {options['path']}…")
+        try:
+            result = bulk_import_customers(
+                read_customer_rows(options["path"]),
+                batch_size=max(1, options["batch_size"]),
+                dry_run=options["dry_run"],
+            )
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Could not read {options['path']}: {e}")
+
+        for number, reason in result.rejected[:50]:
+            self.stderr.write(f"❌ Row {number}: {reason}")
+        if len(result.rejected) > 50:
+            self.stderr.write(f"… and {len(result.rejected) - 50} more rejected rows.")
+
+        verb = "would be imported" if options["dry_run"] else "imported"
+        self.stdout.write(f"✔ {result.created} customer(s) {verb}, {len(result.rejected)} rejected.")
+        if not result.rejected:
+            self.stdout.write(self.style.SUCCESS("🎉 Import finished"))
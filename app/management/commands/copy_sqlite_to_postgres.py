@@ -0,0 +1,114 @@
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.migrations.recorder import MigrationRecorder
+
+from app.services.search_index import get_backend
+
+SOURCE_ALIAS = "sqlite_source"
+
+
+class Command(BaseCommand):
+    help = "Copy every row from the SQLite database file into the PostgreSQL database in DATABASE_URL"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--source",
+            type=Path,
+            default=settings.SQLITE_PATH,
+            help="SQLite file to copy from (default: the file used when DATABASE_URL is unset).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Rows read from SQLite per batch.",
+        )
+        parser.add_argument(
+            "--replace",
+            action="store_true",
+            help="Empty the target tables first, even if they already hold data.",
+        )
+
+    def handle(self, *args, **options):
+        target = connections[DEFAULT_DB_ALIAS]
+        if target.vendor != "postgresql":
+            raise CommandError("Set DATABASE_URL to the PostgreSQL database to copy into.")
+        if not options["source"].exists():
+            raise CommandError(f"{options['source']} does not exist.")
+
+        source = self._open_source(options["source"])
+        self._check_migrations(source, target)
+
+        models = [
+            model
+            for model in apps.get_models(include_auto_created=True)
+            if model._meta.managed and not model._meta.proxy
+        ]
+        if not options["replace"]:
+            filled = [
+                model._meta.label for model in models if model._meta.app_label == "app" and model._base_manager.exists()
+            ]
+            if filled:
+                raise CommandError(f"Target already has data in {', '.join(filled)}; use --replace to overwrite it.")
+
+        self.stdout.write(f"➡️ Copying {options['source']} into {target.settings_dict['NAME']}…")
+        with transaction.atomic():
+            with target.cursor() as cursor:
+                # Bulk loads outlive the web request statement_timeout; the
+                # foreign keys are checked once, at commit.
+                cursor.execute("SET LOCAL statement_timeout = 0")
+                cursor.execute("SET CONSTRAINTS ALL DEFERRED")
+                tables = ", ".join(target.ops.quote_name(model._meta.db_table) for model in models)
+                cursor.execute(f"TRUNCATE {tables} CASCADE")
+
+                for model in models:
+                    copied = self._copy_table(model, source, cursor, options["batch_size"])
+                    self.stdout.write(f"  ✔ {model._meta.db_table}: {copied} row(s)")
+
+                for sql in target.ops.sequence_reset_sql(no_style(), models):
+                    cursor.execute(sql)
+
+            # Search documents are derived from the copied rows.
+            get_backend(target).rebuild()
+
+        self.stdout.write(self.style.SUCCESS("🎉 Copy complete. Point the app at DATABASE_URL from now on."))
+
+    def _open_source(self, path):
+        connections.settings[SOURCE_ALIAS] = connections.configure_settings(
+            {
+                DEFAULT_DB_ALIAS: connections.settings[DEFAULT_DB_ALIAS],
+                SOURCE_ALIAS: {"ENGINE": "django.db.backends.sqlite3", "NAME": str(path)},
+            }
+        )[SOURCE_ALIAS]
+        return connections[SOURCE_ALIAS]
+
+    def _check_migrations(self, source, target):
+        source_state = MigrationRecorder(source).applied_migrations().keys()
+        target_state = MigrationRecorder(target).applied_migrations().keys()
+        if set(source_state) != set(target_state):
+            raise CommandError(
+                "The SQLite file and the target database are at different migrations. "
+                "Run `manage.py migrate` against both before copying."
+            )
+
+    def _copy_table(self, model, source, cursor, batch_size):
+        """Stream one table with COPY; values are prepared by each field as for a save."""
+        fields = model._meta.concrete_fields
+        target = cursor.db
+        columns = ", ".join(target.ops.quote_name(field.column) for field in fields)
+        rows = model._base_manager.using(source.alias).order_by("pk").values_list(*[f.attname for f in fields])
+
+        copied = 0
+        # Django's cursor wraps psycopg's; COPY needs the underlying one.
+        with cursor.cursor.copy(f"COPY {target.ops.quote_name(model._meta.db_table)} ({columns}) FROM STDIN") as copy:
+            for row in rows.iterator(chunk_size=batch_size):
+                copy.write_row(
+                    [field.get_db_prep_save(value, target) for field, value in zip(fields, row)]
+                )
+                copied += 1
+        return copied
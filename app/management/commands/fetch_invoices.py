@@ -1,42 +1,227 @@
-from django.core.management.base import BaseCommand
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils import timezone
+
+from app.services.backfill import SHARD_PERIODS, plan_shards, run_shard
+from app.services.ingestion_workers import init_worker
 from app.services.jofoatara_api import JofoataraClient
-from app.services.invoice_logic import process_invoice_payload
-from django.db import transaction
+from app.services.invoice_logic import IngestionIdentityMap, process_invoice_batch
+from app.services.payload_archive import PayloadArchive
+from app.services.invoice_sync import (
+    SyncStats,
+    SyncWatermark,
+    iter_batches,
+    iter_invoice_details,
+    skip_ingested,
+)
+
 
 class Command(BaseCommand):
     help = "Fetch and store all invoices into the DB"
 
-    def handle(self, *args, **kwargs):
-        client = JofoataraClient()
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Number of invoice detail requests to run concurrently (default: 1).",
+        )
+        parser.add_argument(
+            "--max-in-flight",
+            type=int,
+            default=None,
+            help="Cap on invoices being fetched or waiting for the writer "
+            "(default: batch size + workers, at least 2 x workers).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=50,
+            help="Invoices written per database transaction (default: 50).",
+        )
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Ignore the stored watermark and re-walk every page.",
+        )
+        parser.add_argument(
+            "--no-archive",
+            action="store_true",
+            help="Do not append fetched payloads to the local payload archive.",
+        )
+        parser.add_argument(
+            "--base-url",
+            default=None,
+            help="JOFotara API root (default: JOFOTARA_BASE_URL), e.g. a local stand-in server.",
+        )
+        parser.add_argument(
+            "--shard-by",
+            choices=SHARD_PERIODS,
+            default=None,
+            help="Backfill --since..--until as date-range shards run in parallel processes.",
+        )
+        parser.add_argument("--since", type=date.fromisoformat, help="Backfill start date (YYYY-MM-DD).")
+        parser.add_argument("--until", type=date.fromisoformat, help="Backfill end date (default: today).")
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Worker processes for --shard-by (default: number of CPUs).",
+        )
+
+    def handle(self, *args, **options):
+        workers = max(1, options["workers"])
+        self.batch_size = max(1, options["batch_size"])
+        if options["shard_by"]:
+            return self._backfill(options, workers)
+
+        client = JofoataraClient(pool_size=workers, base_url=options["base_url"])
+        self.stats = SyncStats()
 
         try:
             self.stdout.write("➡️ Logging in…")
-            client.login()
+            client.ensure_login()
             self.stdout.write("✔ Logged in.")
         except Exception as e:
             self.stderr.write(f"❌ Login failed: {e}")
             return
 
+        watermark = SyncWatermark(full=options["full"])
+        if watermark.state.has_watermark and not options["full"]:
+            self.stdout.write(
+                f"➡️ Incremental sync since {watermark.state.last_issue_date or watermark.state.last_uuid}"
+            )
+
+        self.stdout.write("➡️ Streaming invoice list…")
+        pages = self._counted(client.iter_invoice_pages(stop_at=watermark.reached))
+        if options["full"]:
+            invoices = (summary for page in pages for summary in page)
+        else:
+            invoices = skip_ingested(pages)
+
+        if workers > 1:
+            self.stdout.write(f"➡️ Fetching details with {workers} workers…")
+
+        details = iter_invoice_details(
+            client,
+            invoices,
+            workers=workers,
+            max_in_flight=options["max_in_flight"] or max(workers * 2, self.batch_size + workers),
+            stats=self.stats,
+        )
+        self.identities = IngestionIdentityMap().preload()
+        self.found = self.page_count = self.failures = 0
+        self.archive = None if options["no_archive"] else PayloadArchive()
         try:
-            self.stdout.write("➡️ Fetching invoice list…")
-            invoices = client.fetch_all_invoices()
-            self.stdout.write(f"✔ {len(invoices)} invoices found.")
+            self._process(details)
         except Exception as e:
             self.stderr.write(f"❌ Failed to fetch invoice list: {e}")
+            self.stderr.write("⚠ Watermark not advanced.")
             return
+        finally:
+            if self.archive:
+                self.archive.close()
+        self.stats.finish()
+        self.stdout.write(f"✔ {self.found} invoices found on {self.page_count} pages.")
+        summary = self.stats.summary()
+        self.stdout.write(
+            f"✔ {summary['invoices']} written in {summary['elapsed_s']:.1f}s "
+            f"({summary['invoices_per_s']:.1f}/s, DB {summary['db_write_s']:.1f}s)"
+        )
+        self.stdout.write(
+            f"   fetch {summary['fetched_per_s']:.1f}/s · "
+            f"queue avg {summary['queue_depth_avg']:.1f} max {summary['queue_depth_max']} · "
+            f"write {summary['written_per_db_s']:.1f}/s in {summary['db_batches']} batches"
+        )
 
-        for inv in invoices:
-            try:
-                self.stdout.write(f"➡️ Fetching details for invoice {inv['invoiceNumber']}...")
-                full = client.fetch_invoice(inv["invoiceUniqueIdentifier"], inv["invoiceNumber"])
-                if not full:
-                    self.stdout.write(f"⚠ Skipped invoice {inv['invoiceNumber']}: missing customer name")
-                    continue
+        # Only advance the watermark when nothing was lost, otherwise the next
+        # incremental run would page past the failed invoices.
+        if self.failures:
+            self.stderr.write(f"⚠ {self.failures} invoices failed; watermark not advanced.")
+        else:
+            watermark.save()
 
-                with transaction.atomic():
-                    process_invoice_payload(full)
-                    self.stdout.write(f"✔ Processed invoice {inv['invoiceNumber']}")
-            except Exception as e:
-                self.stderr.write(f"❌ Failed to process invoice {inv['invoiceNumber']}: {e}")
+        self.stdout.write(self.style.SUCCESS("🎉 All invoices processed successfully"))
+
+    def _backfill(self, options, workers):
+        if not options["since"]:
+            raise CommandError("--shard-by needs --since.")
+        until = options["until"] or timezone.localdate()
 
-        self.stdout.write(self.style.SUCCESS("🎉 All invoices processed successfully"))
\ No newline at end of file
+        try:
+            self.stdout.write("➡️ Logging in…")
+            # Warms the token cache, so the worker processes skip the login call.
+            JofoataraClient(base_url=options["base_url"]).ensure_login()
+            self.stdout.write("✔ Logged in.")
+        except Exception as e:
+            self.stderr.write(f"❌ Login failed: {e}")
+            return
+
+        shards = plan_shards(options["since"], until)
+        if not shards:
+            self.stdout.write(self.style.SUCCESS("🎉 Backfill already complete"))
+            return
+
+        processes = max(1, min(options["processes"], len(shards)))
+        self.stdout.write(
+            f"➡️ Backfilling {options['since']}..{until} in {len(shards)} shard(s) "
+            f"with {processes} process(es)…"
+        )
+        args = (options["base_url"], workers, self.batch_size)
+        if processes == 1:
+            results = [(shard, run_shard(shard.pk, *args)) for shard in shards]
+        else:
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=processes, initializer=init_worker) as pool:
+                futures = [(shard, pool.submit(run_shard, shard.pk, *args)) for shard in shards]
+                results = [(shard, future.result()) for shard, future in futures]
+
+        failed_shards = 0
+        for shard, (written, failed) in results:
+            mark = "❌" if failed else "✔"
+            failed_shards += bool(failed)
+            self.stdout.write(f"{mark} {shard.date_from}..{shard.date_to}: {written} written, {failed} failed")
+
+        if failed_shards:
+            self.stderr.write(f"⚠ {failed_shards} shard(s) incomplete; run the same command again to resume.")
+        else:
+            self.stdout.write(self.style.SUCCESS("🎉 Backfill finished"))
+
+    def _counted(self, pages):
+        for _, items in pages:
+            self.page_count += 1
+            self.found += len(items)
+            yield items
+
+    def _accepted(self, details):
+        for inv, full, error in details:
+            if error:
+                self.failures += 1
+                self.stderr.write(f"❌ Failed to fetch invoice {inv['invoiceNumber']}: {error}")
+                continue
+            if self.archive:
+                self.archive.append(full)
+            yield inv, full
+
+    def _process(self, details):
+        # One transaction per batch: the writer commits (and SQLite fsyncs)
+        # once per ``batch_size`` invoices instead of once per invoice.
+        for batch in iter_batches(self._accepted(details), self.batch_size):
+            started = time.perf_counter()
+            results = process_invoice_batch([full for _, full in batch], identities=self.identities)
+            written = 0
+            for (inv, _), (_, invoice, error) in zip(batch, results):
+                if error:
+                    self.failures += 1
+                    self.stderr.write(f"❌ Failed to process invoice {inv['invoiceNumber']}: {error}")
+                elif invoice is None:
+                    self.stdout.write(f"⚠ Skipped invoice {inv['invoiceNumber']}: missing customer name")
+                else:
+                    written += 1
+                    self.stdout.write(f"✔ Processed invoice {inv['invoiceNumber']}")
+            self.stats.record_write(time.perf_counter() - started, count=written)
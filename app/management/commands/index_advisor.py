@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from app.services.index_advisor import advise
+
+
+class Command(BaseCommand):
+    help = "EXPLAIN the app's known hot queries and flag full table scans"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--verbose-plans", action="store_true", help="Print every query plan.")
+        parser.add_argument(
+            "--fail-on-scan",
+            action="store_true",
+            help="Exit with an error when any query needs a full scan (for CI).",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            results = list(advise())
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        flagged = 0
+        for label, plan, scanned in results:
+            if scanned:
+                flagged += 1
+                self.stderr.write(f"❌ {label}: full scan of {', '.join(scanned)}")
+            else:
+                self.stdout.write(f"✔ {label}")
+            if options["verbose_plans"] or scanned:
+                for line in plan.splitlines():
+                    self.stdout.write(f"      {line}")
+
+        if flagged:
+            message = f"{flagged} of {len(results)} queries need a full scan."
+            if options["fail_on_scan"]:
+                raise CommandError(message)
+            self.stderr.write(f"⚠ {message}")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"🎉 All {len(results)} queries use an index"))
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+
+from app.services.jofotara_standin import JofotaraStandin, StandinConfig
+
+
+class Command(BaseCommand):
+    help = "Serve a local stand-in for the JOFotara API (login, invoice list and details)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8800)
+        parser.add_argument("--invoices", type=int, default=1000, help="Number of invoices served.")
+        parser.add_argument("--page-size", type=int, default=50)
+        parser.add_argument("--lines", type=int, default=3, help="Line items per invoice.")
+        parser.add_argument("--customers", type=int, default=50, help="Distinct buyer names.")
+        parser.add_argument("--list-latency-ms", type=int, default=0)
+        parser.add_argument(
+            "--error-rate",
+            type=float,
+            default=0.0,
+            help="Share of requests answered with 503 + Retry-After (0-1).",
+        )
+        parser.add_argument("--detail-latency-ms", type=int, default=0)
+
+    def handle(self, *args, **options):
+        config = StandinConfig(
+            invoices=options["invoices"],
+            page_size=options["page_size"],
+            lines_per_invoice=options["lines"],
+            customers=options["customers"],
+            list_latency_ms=options["list_latency_ms"],
+            detail_latency_ms=options["detail_latency_ms"],
+            error_rate=options["error_rate"],
+        )
+        server = JofotaraStandin(config, host=options["host"], port=options["port"])
+        self.stdout.write(
+            f"➡️ JOFotara stand-in serving {config.invoices} invoices at {server.url} "
+            f"(set JOFOTARA_BASE_URL or pass --base-url to fetch_invoices). Ctrl+C to stop."
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from app.models import Customer, Invoice
+from app.services.search_index import get_backend
+
+
+class Command(BaseCommand):
+    help = "Re-create the full-text search documents for every customer and invoice"
+
+    def handle(self, *args, **options):
+        backend = get_backend()
+        if not backend.enabled:
+            self.stdout.write("⚠ This database has no full-text index; search uses substring matches.")
+            return
+
+        self.stdout.write(f"➡️ Rebuilding the {type(backend).__name__} index…")
+        with transaction.atomic():
+            backend.rebuild()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"🎉 Indexed {Customer.objects.count()} customer(s) and {Invoice.objects.count()} invoice(s)"
+            )
+        )
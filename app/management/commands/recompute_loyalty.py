@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from app.models import Customer
+
+
+class Command(BaseCommand):
+    help = "Reassign every unlocked customer's loyalty tier from the current LoyaltySettings"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=5000,
+            help="Customers per UPDATE statement (default: 5000).",
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write("➡️ Recomputing loyalty tiers…")
+        updated = Customer.recompute_loyalty(chunk_size=max(1, options["chunk_size"]))
+        self.stdout.write(self.style.SUCCESS(f"🎉 {updated} customer(s) changed tier"))
@@ -0,0 +1,53 @@
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from app.models import FailedInvoicePayload
+from app.services.ingestion_workers import init_worker
+from app.services.invoice_logic import redrive_failed_payloads
+
+
+class Command(BaseCommand):
+    help = "Retry invoice payloads that previously failed to ingest"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=1,
+            help="Number of worker processes; failed payloads are split between them.",
+        )
+        parser.add_argument(
+            "--max-attempts",
+            type=int,
+            default=None,
+            help="Leave payloads that already failed this many times alone.",
+        )
+
+    def handle(self, *args, **options):
+        pending = FailedInvoicePayload.objects.count()
+        if not pending:
+            self.stdout.write("✔ No failed payloads to re-drive.")
+            return
+
+        processes = max(1, options["processes"])
+        self.stdout.write(f"➡️ Re-driving {pending} failed payload(s) with {processes} process(es)…")
+
+        if processes == 1:
+            results = [redrive_failed_payloads(max_attempts=options["max_attempts"])]
+        else:
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=processes, initializer=init_worker) as pool:
+                futures = [
+                    pool.submit(redrive_failed_payloads, shard, processes, options["max_attempts"])
+                    for shard in range(processes)
+                ]
+                results = [future.result() for future in futures]
+
+        recovered, failed = (sum(counts) for counts in zip(*results))
+        self.stdout.write(f"✔ {recovered} recovered, {failed} still failing.")
+        if failed:
+            self.stderr.write("⚠ Some payloads still fail; see the log or the admin for details.")
+        else:
+            self.stdout.write(self.style.SUCCESS("🎉 Dead-letter queue drained"))
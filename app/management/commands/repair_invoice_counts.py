@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from app.models import Customer
+
+
+class Command(BaseCommand):
+    help = "Reconcile Customer.invoice_count with the invoices actually stored"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report customers whose counter has drifted.",
+        )
+
+    def handle(self, *args, **options):
+        if options["dry_run"]:
+            drifted = Customer.invoice_count_drift()
+            for customer in drifted:
+                self.stdout.write(
+                    f"⚠ {customer.name}: stored {customer.invoice_count}, actual {customer.actual_invoice_count}"
+                )
+            self.stdout.write(f"✔ {len(drifted)} customer(s) drifted.")
+            return
+
+        with transaction.atomic():
+            repaired = Customer.repair_invoice_counts()
+            for customer in repaired:
+                customer.update_loyalty_status_from_invoices()
+
+        self.stdout.write(self.style.SUCCESS(f"🎉 Repaired {len(repaired)} customer invoice count(s)"))
@@ -0,0 +1,57 @@
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from app.services.ingestion_workers import init_worker
+from app.services.payload_archive import PayloadArchive, replay_shard, seed_identities
+
+
+class Command(BaseCommand):
+    help = "Rebuild invoices from the local JOFotara payload archive without touching the network"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--since", type=date.fromisoformat, help="First archive day (YYYY-MM-DD).")
+        parser.add_argument("--until", type=date.fromisoformat, help="Last archive day (YYYY-MM-DD).")
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=1,
+            help="Number of worker processes; invoices are split between them by uuid.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=50,
+            help="Invoices written per database transaction (default: 50).",
+        )
+        parser.add_argument("--archive-dir", help="Archive root (default: settings.JOFOTARA_ARCHIVE_DIR).")
+
+    def handle(self, *args, **options):
+        archive = PayloadArchive(options["archive_dir"])
+        paths = archive.partitions(since=options["since"], until=options["until"])
+        if not paths:
+            raise CommandError(f"No archived payloads found under {archive.root}")
+
+        processes = max(1, options["processes"])
+        self.stdout.write(f"➡️ Replaying {len(paths)} archive days with {processes} process(es)…")
+
+        if processes == 1:
+            results = [replay_shard(paths, batch_size=options["batch_size"])]
+        else:
+            seed_identities(paths)
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=processes, initializer=init_worker) as pool:
+                futures = [
+                    pool.submit(replay_shard, paths, shard, processes, options["batch_size"])
+                    for shard in range(processes)
+                ]
+                results = [future.result() for future in futures]
+
+        processed, skipped, failed = (sum(counts) for counts in zip(*results))
+        self.stdout.write(f"✔ {processed} processed, {skipped} skipped, {failed} failed.")
+        if failed:
+            self.stderr.write("⚠ Some payloads failed; see the log for details.")
+        else:
+            self.stdout.write(self.style.SUCCESS("🎉 Replay finished"))
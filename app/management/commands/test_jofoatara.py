@@ -10,7 +10,7 @@ class Command(BaseCommand):
         client = JofoataraClient()
 
         print("➡️ Logging in…")
-        client.login()
+        client.ensure_login()
         print("✔ Login success.")
 
         print("\n➡️ Fetching invoice list…")
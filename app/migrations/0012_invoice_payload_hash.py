@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0011_sync_state'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='invoice',
+            name='payload_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True),
+        ),
+    ]
@@ -0,0 +1,91 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:55
+
+import hashlib
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def move_qr_codes(apps, schema_editor):
+    """Store each distinct QR once and point invoices at it."""
+    Invoice = apps.get_model("app", "Invoice")
+    QrCode = apps.get_model("app", "QrCode")
+
+    invoices = Invoice.objects.exclude(qr_base64__isnull=True).exclude(qr_base64="")
+    for invoice in invoices.only("pk", "qr_base64", "qr_image").iterator():
+        data = invoice.qr_base64
+        if data.startswith("data:image"):
+            _, data = data.split(",", 1)
+        digest = hashlib.sha256(data.encode("ascii")).hexdigest()
+        qr_code, _ = QrCode.objects.get_or_create(
+            digest=digest,
+            defaults={"data": data, "image": invoice.qr_image.name or None},
+        )
+        Invoice.objects.filter(pk=invoice.pk).update(qr_code=qr_code)
+
+
+def restore_qr_codes(apps, schema_editor):
+    Invoice = apps.get_model("app", "Invoice")
+    for invoice in (
+        Invoice.objects.select_related("qr_code").exclude(qr_code=None).iterator()
+    ):
+        Invoice.objects.filter(pk=invoice.pk).update(
+            qr_base64=invoice.qr_code.data,
+            qr_image=invoice.qr_code.image.name or None,
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("app", "0012_invoice_payload_hash"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="QrCode",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "digest",
+                    models.CharField(editable=False, max_length=64, unique=True),
+                ),
+                ("data", models.TextField(editable=False)),
+                (
+                    "image",
+                    models.ImageField(blank=True, null=True, upload_to="invoices/qr/"),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                "verbose_name": "QR code",
+            },
+        ),
+        migrations.AddField(
+            model_name="invoice",
+            name="qr_code",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="invoices",
+                to="app.qrcode",
+            ),
+        ),
+        migrations.RunPython(move_qr_codes, restore_qr_codes),
+        migrations.RemoveField(
+            model_name="invoice",
+            name="qr_base64",
+        ),
+        migrations.RemoveField(
+            model_name="invoice",
+            name="qr_image",
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:56
+
+from django.db import migrations
+
+
+def vacuum_sqlite(apps, schema_editor):
+    """Give the dropped base64 column's pages back to the filesystem."""
+    if schema_editor.connection.vendor == "sqlite":
+        schema_editor.execute("VACUUM")
+
+
+class Migration(migrations.Migration):
+    # VACUUM cannot run inside a transaction.
+    atomic = False
+
+    dependencies = [
+        ("app", "0013_qr_code_storage"),
+    ]
+
+    operations = [
+        migrations.RunPython(vacuum_sqlite, migrations.RunPython.noop, elidable=True),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:05
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0014_reclaim_qr_base64_space"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="FailedInvoicePayload",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("uuid", models.CharField(max_length=64, unique=True)),
+                ("invoice_number", models.CharField(blank=True, max_length=100)),
+                ("payload", models.JSONField()),
+                ("error", models.TextField()),
+                ("attempts", models.PositiveIntegerField(default=1)),
+                ("first_failed_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "last_failed_at",
+                    models.DateTimeField(default=django.utils.timezone.now),
+                ),
+            ],
+            options={
+                "verbose_name": "Failed invoice payload",
+                "ordering": ("first_failed_at",),
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:10
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_invoice_counts(apps, schema_editor):
+    Customer = apps.get_model("app", "Customer")
+    Invoice = apps.get_model("app", "Invoice")
+    counts = (
+        Invoice.objects.filter(customer=OuterRef("pk"))
+        .order_by()
+        .values("customer")
+        .annotate(total=Count("pk"))
+        .values("total")
+    )
+    Customer.objects.update(invoice_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0016_backfill_shard"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="customer",
+            name="invoice_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_invoice_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:16
+
+from django.db import migrations, models
+
+PREFIX_SEARCH_COLUMNS = {
+    "customer_name_prefix_idx": "name",
+    "customer_email_prefix_idx": "email",
+    "customer_phone_prefix_idx": "phone_number",
+}
+
+
+def create_prefix_search_indexes(apps, schema_editor):
+    # istartswith compiles to a case-insensitive LIKE 'x%'. SQLite only uses
+    # an index for it when the column is indexed COLLATE NOCASE; PostgreSQL
+    # needs an UPPER() expression index with a pattern operator class.
+    vendor = schema_editor.connection.vendor
+    for index, column in PREFIX_SEARCH_COLUMNS.items():
+        if vendor == "sqlite":
+            schema_editor.execute(
+                f'CREATE INDEX IF NOT EXISTS "{index}" ON "app_customer" ("{column}" COLLATE NOCASE)'
+            )
+        elif vendor == "postgresql":
+            schema_editor.execute(
+                f'CREATE INDEX IF NOT EXISTS "{index}" ON "app_customer" (UPPER("{column}") varchar_pattern_ops)'
+            )
+
+
+def drop_prefix_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor in ("sqlite", "postgresql"):
+        for index in PREFIX_SEARCH_COLUMNS:
+            schema_editor.execute(f'DROP INDEX IF EXISTS "{index}"')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0018_invoice_number_sequence"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="customer",
+            index=models.Index(
+                fields=["loyalty_status", "-invoice_count", "name"],
+                name="customer_loyalty_rank_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="invoice",
+            index=models.Index(
+                fields=["customer", "-issue_date", "-invoice_number"],
+                name="invoice_customer_recent_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="invoice",
+            index=models.Index(
+                fields=["status", "issue_date"], name="invoice_status_date_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="invoice",
+            index=models.Index(
+                fields=["payment_method", "issue_date"], name="invoice_payment_date_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="invoice",
+            index=models.Index(fields=["-issue_date"], name="invoice_issue_date_idx"),
+        ),
+        migrations.RunPython(create_prefix_search_indexes, drop_prefix_search_indexes),
+    ]
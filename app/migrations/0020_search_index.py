@@ -0,0 +1,186 @@
+from django.db import migrations
+
+# Search documents live in plain tables keyed by the source row; the full-text
+# structure on top is vendor-specific. app.services.search_index reads and
+# maintains them; nothing here imports it, so this migration stays as written.
+SQLITE_FORWARD = [
+    """
+    CREATE TABLE IF NOT EXISTS "app_customer_search" (
+        "id" integer NOT NULL PRIMARY KEY AUTOINCREMENT,
+        "customer_id" char(32) NOT NULL UNIQUE,
+        "name" text NOT NULL,
+        "email" text NOT NULL,
+        "phone" text NOT NULL
+    )
+    """,
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS "app_customer_fts" USING fts5(
+        name, email, phone,
+        content='app_customer_search', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='1 2 3'
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS "app_invoice_search" (
+        "invoice_id" integer NOT NULL PRIMARY KEY,
+        "invoice_number" text NOT NULL,
+        "notes" text NOT NULL,
+        "lines" text NOT NULL
+    )
+    """,
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS "app_invoice_fts" USING fts5(
+        invoice_number, notes, lines,
+        content='app_invoice_search', content_rowid='invoice_id',
+        tokenize='unicode61 remove_diacritics 2', prefix='1 2 3'
+    )
+    """,
+]
+
+# Standard FTS5 external-content triggers: keep the index in step with the
+# document tables.
+for table, fts, key, columns in (
+    ("app_customer_search", "app_customer_fts", "id", ("name", "email", "phone")),
+    (
+        "app_invoice_search",
+        "app_invoice_fts",
+        "invoice_id",
+        ("invoice_number", "notes", "lines"),
+    ),
+):
+    cols = ", ".join(columns)
+    new = ", ".join(f"new.{c}" for c in columns)
+    old = ", ".join(f"old.{c}" for c in columns)
+    SQLITE_FORWARD += [
+        f"""CREATE TRIGGER IF NOT EXISTS "{table}_ai" AFTER INSERT ON "{table}" BEGIN
+            INSERT INTO "{fts}"(rowid, {cols}) VALUES (new.{key}, {new});
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS "{table}_ad" AFTER DELETE ON "{table}" BEGIN
+            INSERT INTO "{fts}"("{fts}", rowid, {cols}) VALUES ('delete', old.{key}, {old});
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS "{table}_au" AFTER UPDATE ON "{table}" BEGIN
+            INSERT INTO "{fts}"("{fts}", rowid, {cols}) VALUES ('delete', old.{key}, {old});
+            INSERT INTO "{fts}"(rowid, {cols}) VALUES (new.{key}, {new});
+        END""",
+    ]
+
+SQLITE_REVERSE = [
+    'DROP TABLE IF EXISTS "app_customer_fts"',
+    'DROP TABLE IF EXISTS "app_customer_search"',
+    'DROP TABLE IF EXISTS "app_invoice_fts"',
+    'DROP TABLE IF EXISTS "app_invoice_search"',
+]
+
+POSTGRES_FORWARD = [
+    """
+    CREATE TABLE IF NOT EXISTS "app_customer_search" (
+        "customer_id" uuid NOT NULL PRIMARY KEY,
+        "document" tsvector NOT NULL
+    )
+    """,
+    'CREATE INDEX IF NOT EXISTS "app_customer_search_gin" ON "app_customer_search" USING GIN ("document")',
+    """
+    CREATE TABLE IF NOT EXISTS "app_invoice_search" (
+        "invoice_id" bigint NOT NULL PRIMARY KEY,
+        "document" tsvector NOT NULL
+    )
+    """,
+    'CREATE INDEX IF NOT EXISTS "app_invoice_search_gin" ON "app_invoice_search" USING GIN ("document")',
+]
+
+POSTGRES_REVERSE = [
+    'DROP TABLE IF EXISTS "app_customer_search"',
+    'DROP TABLE IF EXISTS "app_invoice_search"',
+]
+
+
+# Documents for the rows that exist at migrate time. Frozen copies of the
+# backend's rebuild at the time of this migration; later maintenance goes
+# through the rebuild_search_index command.
+SQLITE_INDEX = [
+    "DELETE FROM app_customer_search",
+    "DELETE FROM app_invoice_search",
+    """
+    INSERT INTO app_customer_search (customer_id, name, email, phone)
+    SELECT c.id, c.name, COALESCE(c.email, ''), COALESCE(c.phone_number, '')
+    FROM app_customer c
+    """,
+    """
+    INSERT INTO app_invoice_search (invoice_id, invoice_number, notes, lines)
+    SELECT i.id, i.invoice_number, COALESCE(i.notes, ''), COALESCE(
+        (SELECT group_concat(l.description, ' ') FROM app_invoicelineitem l WHERE l.invoice_id = i.id), ''
+    )
+    FROM app_invoice i
+    """,
+    "INSERT INTO app_customer_fts (app_customer_fts) VALUES ('rebuild')",
+    "INSERT INTO app_customer_fts (app_customer_fts) VALUES ('optimize')",
+    "INSERT INTO app_invoice_fts (app_invoice_fts) VALUES ('rebuild')",
+    "INSERT INTO app_invoice_fts (app_invoice_fts) VALUES ('optimize')",
+]
+
+POSTGRES_INDEX = [
+    "TRUNCATE app_customer_search, app_invoice_search",
+    """
+    INSERT INTO app_customer_search (customer_id, document)
+    SELECT c.id, to_tsvector('simple', regexp_replace(
+        concat_ws(' ', c.name, c.email, c.phone_number), '[^[:alnum:]]+', ' ', 'g'
+    ))
+    FROM app_customer c
+    """,
+    """
+    INSERT INTO app_invoice_search (invoice_id, document)
+    SELECT i.id, to_tsvector('simple', regexp_replace(
+        concat_ws(' ', i.invoice_number, i.notes,
+            (SELECT string_agg(l.description, ' ') FROM app_invoicelineitem l WHERE l.invoice_id = i.id)),
+        '[^[:alnum:]]+', ' ', 'g'
+    ))
+    FROM app_invoice i
+    """,
+]
+
+
+def _fts5_available(connection):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        return bool(cursor.fetchone()[0])
+
+
+def _search_enabled(connection):
+    if connection.vendor == "sqlite":
+        # No FTS5 in this SQLite build: search falls back to substring matches.
+        return _fts5_available(connection)
+    return connection.vendor == "postgresql"
+
+
+def create_search_tables(apps, schema_editor):
+    if not _search_enabled(schema_editor.connection):
+        return
+    statements = {"sqlite": SQLITE_FORWARD, "postgresql": POSTGRES_FORWARD}
+    for sql in statements[schema_editor.connection.vendor]:
+        schema_editor.execute(sql)
+
+
+def drop_search_tables(apps, schema_editor):
+    statements = {"sqlite": SQLITE_REVERSE, "postgresql": POSTGRES_REVERSE}
+    for sql in statements.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql)
+
+
+def index_existing_rows(apps, schema_editor):
+    if not _search_enabled(schema_editor.connection):
+        return
+    statements = {"sqlite": SQLITE_INDEX, "postgresql": POSTGRES_INDEX}
+    for sql in statements[schema_editor.connection.vendor]:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0019_query_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_tables, drop_search_tables),
+        migrations.RunPython(index_existing_rows, migrations.RunPython.noop),
+    ]
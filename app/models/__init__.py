@@ -1,7 +1,12 @@
 from .seller import Seller
 from .customer import Customer
 from .item import Item
+from .qr_code import QrCode
 from .discount import Discount
 from .invoice import Invoice
 from .invoice_line_item import InvoiceLineItem
-from .invoice_discount import InvoiceDiscount
\ No newline at end of file
+from .invoice_discount import InvoiceDiscount
+from .sync_state import SyncState
+from .failed_invoice_payload import FailedInvoicePayload
+from .backfill_shard import BackfillShard
+from .invoice_number_sequence import InvoiceNumberSequence
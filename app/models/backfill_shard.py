@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+from django.db import models
+
+
+class BackfillShard(models.Model):
+    """
+    Checkpoint for one date-range slice of a sharded historical backfill.
+
+    ``last_page`` is the last list page whose invoices were all committed,
+    so an interrupted shard resumes on the page after it.
+    """
+
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (FAILED, "Failed"),
+    ]
+
+    date_from = models.DateField()
+    date_to = models.DateField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    last_page = models.PositiveIntegerField(default=0)
+    invoices = models.PositiveIntegerField(default=0)
+    failures = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Backfill shard"
+        ordering = ("-date_from",)
+        constraints = [
+            models.UniqueConstraint(fields=["date_from", "date_to"], name="unique_backfill_shard_range"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.date_from}..{self.date_to} ({self.status}, page {self.last_page})"
@@ -1,10 +1,12 @@
 from __future__ import annotations
-import uuid
 import re
+import time
+import uuid
 from django.core.exceptions import ValidationError
 from django.core.validators import EmailValidator
-from django.db import models
-from django.db.models import Q
+from django.db import models, transaction
+from django.db.models import Case, Count, F, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce, Greatest
 
 from django.utils import timezone
 
@@ -28,18 +30,62 @@ class LoyaltySettings(models.Model):
                 "Thresholds must increase from Silver to Gold to Platinum."
             )
 
+    # Seconds this process trusts its copy before checking ``updated_at``.
+    CACHE_TTL = 2.0
+
+    # (monotonic time of the last check, instance) for this process.
+    _solo = (None, None)
+
     @classmethod
     def get_solo(cls) -> "LoyaltySettings":
-        settings, _ = cls.objects.get_or_create(
-            defaults={
-                "silver_threshold": 50,
-                "gold_threshold": 250,
-                "platinum_threshold": 500,
-                "updated_at": timezone.now(),
-            }
-        )
+        """
+        The settings row, cached in-process.
+
+        The copy is served as is for ``CACHE_TTL`` seconds. After that, one
+        query of the row's ``updated_at`` tells whether another process
+        (desktop app, admin server, ingestion command) has saved new
+        thresholds; only then is the row read again. Tier writes do not rely
+        on this copy: ``loyalty_status_expression`` reads the thresholds in
+        the same statement.
+        """
+        checked_at, settings = cls._solo
+        now = time.monotonic()
+        if settings is not None and now - checked_at < cls.CACHE_TTL:
+            return settings
+
+        if settings is None or cls.objects.values_list("updated_at", flat=True).first() != settings.updated_at:
+            settings, _ = cls.objects.get_or_create(
+                defaults={
+                    "silver_threshold": 50,
+                    "gold_threshold": 250,
+                    "platinum_threshold": 500,
+                    "updated_at": timezone.now(),
+                }
+            )
+
+        cls._solo = (now, settings)
         return settings
 
+    @classmethod
+    def clear_cache(cls) -> None:
+        """Drop this process's copy. Other processes notice changes through ``updated_at``."""
+        cls._solo = (None, None)
+
+    def save(self, *args, **kwargs) -> None:
+        super().save(*args, **kwargs)
+        # Drop the copy now so this transaction reads its own write, and
+        # again on commit in case it was re-read in between.
+        LoyaltySettings.clear_cache()
+        transaction.on_commit(LoyaltySettings.clear_cache, using=kwargs.get("using"))
+        # New thresholds apply to everyone, not only to customers saved later.
+        transaction.on_commit(lambda: Customer.recompute_loyalty(settings=self), using=kwargs.get("using"))
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        LoyaltySettings.clear_cache()
+        transaction.on_commit(LoyaltySettings.clear_cache, using=kwargs.get("using"))
+        return result
+
     def __str__(self) -> str:
         return "Loyalty thresholds"
 
@@ -85,12 +131,20 @@ class Customer(models.Model):
         default=ContactMethod.NONE,
     )
     billing_address = models.JSONField(null=True, blank=True)
+    # Maintained by Invoice.save and invoice deletion with F() updates;
+    # ``repair_invoice_counts`` reconciles any drift.
+    invoice_count = models.PositiveIntegerField(default=0, editable=False)
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         ordering = ["name"]
+        indexes = [
+            # Loyalty leaders: top customers per tier. Case-insensitive prefix
+            # indexes for name/email/phone are vendor-specific, see 0019.
+            models.Index(fields=["loyalty_status", "-invoice_count", "name"], name="customer_loyalty_rank_idx"),
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=["name", "email"],
@@ -127,7 +181,7 @@ class Customer(models.Model):
         settings: LoyaltySettings | None = None,
     ) -> str:
         settings = settings or LoyaltySettings.get_solo()
-        invoice_total = invoice_count if invoice_count is not None else (self.invoices.count() if self.pk else 0)
+        invoice_total = invoice_count if invoice_count is not None else self.invoice_count
 
         if invoice_total >= settings.platinum_threshold:
             return self.LoyaltyStatus.PLATINUM
@@ -137,28 +191,140 @@ class Customer(models.Model):
             return self.LoyaltyStatus.SILVER
         return self.LoyaltyStatus.NONE
 
+    @classmethod
+    def loyalty_status_expression(cls, settings: LoyaltySettings | None = None) -> Case:
+        """
+        SQL equivalent of ``calculate_loyalty_status`` over the stored ``invoice_count``.
+
+        Without ``settings`` the thresholds are read from the settings row by
+        the same statement, so a process holding an outdated ``get_solo``
+        copy still writes the tiers of the committed thresholds.
+        """
+        if settings is not None:
+            platinum, gold, silver = (
+                Value(settings.platinum_threshold),
+                Value(settings.gold_threshold),
+                Value(settings.silver_threshold),
+            )
+        else:
+            LoyaltySettings.get_solo()  # Creates the row on first use.
+            row = LoyaltySettings.objects.order_by("pk")
+            platinum, gold, silver = (
+                Subquery(row.values(field)[:1])
+                for field in ("platinum_threshold", "gold_threshold", "silver_threshold")
+            )
+        return Case(
+            When(invoice_count__gte=platinum, then=Value(cls.LoyaltyStatus.PLATINUM.value)),
+            When(invoice_count__gte=gold, then=Value(cls.LoyaltyStatus.GOLD.value)),
+            When(invoice_count__gte=silver, then=Value(cls.LoyaltyStatus.SILVER.value)),
+            default=Value(cls.LoyaltyStatus.NONE.value),
+            output_field=models.CharField(),
+        )
+
     def update_loyalty_status_from_invoices(
         self, *, commit: bool = True, settings: LoyaltySettings | None = None
     ) -> bool:
         if self.loyalty_status_locked:
             return False
 
-        invoice_total = self.invoices.count() if self.pk else 0
-        new_status = self.calculate_loyalty_status(
-            invoice_count=invoice_total, settings=settings
+        if not commit:
+            new_status = self.calculate_loyalty_status(settings=settings)
+            changed = new_status != self.loyalty_status
+            self.loyalty_status = new_status
+            return changed
+
+        # Evaluated in the database against the F()-maintained counter, so a
+        # stale in-memory invoice_count can never decide the tier.
+        status = self.loyalty_status_expression(settings)
+        changed = (
+            Customer.objects.filter(pk=self.pk, loyalty_status_locked=False)
+            .exclude(loyalty_status=status)
+            .update(loyalty_status=status, updated_at=timezone.now())
         )
-        if new_status == self.loyalty_status:
-            return False
+        if changed:
+            self.refresh_from_db(fields=["invoice_count", "loyalty_status", "updated_at"])
+        return bool(changed)
+
+    @classmethod
+    def recompute_loyalty(cls, settings: LoyaltySettings | None = None, chunk_size: int = 5000) -> int:
+        """
+        Reassign every unlocked customer's tier with set-based UPDATEs.
+
+        Customers are walked in primary-key ranges of ``chunk_size`` rows, one
+        short transaction each, and only rows whose tier actually changes are
+        written. Returns the number of customers updated.
+        """
+        status = cls.loyalty_status_expression(settings)
+        unlocked = cls.objects.filter(loyalty_status_locked=False).order_by("pk")
+        updated = 0
+        lower = None
+
+        while True:
+            chunk = unlocked if lower is None else unlocked.filter(pk__gt=lower)
+            upper = chunk.values_list("pk", flat=True)[chunk_size - 1 : chunk_size].first()
+            if upper is not None:
+                chunk = chunk.filter(pk__lte=upper)
+
+            with transaction.atomic():
+                updated += (
+                    chunk.exclude(loyalty_status=status)
+                    .order_by()
+                    .update(loyalty_status=status, updated_at=timezone.now())
+                )
+
+            if upper is None:
+                return updated
+            lower = upper
 
-        self.loyalty_status = new_status
-        if commit:
-            super(Customer, self).save(update_fields=["loyalty_status", "updated_at"])
-        return True
+    @classmethod
+    def adjust_invoice_count(cls, customer_id, delta: int) -> None:
+        """
+        Atomically add ``delta`` to a customer's stored invoice count.
+
+        Never goes below zero: a counter that has already drifted low must not
+        make the invoice delete behind it fail. ``repair_invoice_counts``
+        fixes the drift.
+        """
+        if customer_id is not None and delta:
+            cls.objects.filter(pk=customer_id).update(invoice_count=Greatest(F("invoice_count") + delta, 0))
+
+    @classmethod
+    def invoice_count_drift(cls):
+        """Customers whose stored ``invoice_count`` disagrees with their invoices."""
+        from .invoice import Invoice
+
+        actual = Coalesce(
+            Subquery(
+                Invoice.objects.filter(customer=OuterRef("pk"))
+                .order_by()
+                .values("customer")
+                .annotate(total=Count("pk"))
+                .values("total")
+            ),
+            0,
+        )
+        return cls.objects.annotate(actual_invoice_count=actual).exclude(
+            invoice_count=F("actual_invoice_count")
+        )
+
+    @classmethod
+    def repair_invoice_counts(cls) -> list["Customer"]:
+        """Reset drifted counters to the real invoice count and return the repaired customers."""
+        repaired = list(cls.invoice_count_drift())
+        for customer in repaired:
+            customer.invoice_count = customer.actual_invoice_count
+        cls.objects.bulk_update(repaired, ["invoice_count"], batch_size=500)
+        return repaired
 
     def save(self, *args, **kwargs) -> None:
         if not self.loyalty_status_locked:
             self.loyalty_status = self.calculate_loyalty_status()
         self.full_clean()
+        if not self._state.adding and kwargs.get("update_fields") is None and not kwargs.get("force_insert"):
+            # Never write back a possibly stale invoice_count.
+            kwargs["update_fields"] = [
+                f.name for f in self._meta.concrete_fields if not f.primary_key and f.name != "invoice_count"
+            ]
         super().save(*args, **kwargs)
 
     def __str__(self) -> str:
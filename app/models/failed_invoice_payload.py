@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import uuid as uuid_lib
+
+from django.db import models
+from django.db.models import F
+from django.utils import timezone
+
+
+class FailedInvoicePayload(models.Model):
+    """
+    Dead-letter entry for a JOFotara payload that could not be ingested.
+
+    One row per invoice uuid (or per payload digest when the payload has no
+    uuid); a repeated failure overwrites the payload and error and bumps
+    ``attempts``. The row is removed once the invoice is written successfully.
+    """
+
+    uuid = models.CharField(max_length=64, unique=True)
+    invoice_number = models.CharField(max_length=100, blank=True)
+    payload = models.JSONField()
+    error = models.TextField()
+    attempts = models.PositiveIntegerField(default=1)
+    first_failed_at = models.DateTimeField(auto_now_add=True)
+    last_failed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        verbose_name = "Failed invoice payload"
+        ordering = ("first_failed_at",)
+
+    @staticmethod
+    def normalize_uuid(value) -> str:
+        """Canonical text for a uuid, so API strings and ``UUID`` objects match."""
+        try:
+            return str(uuid_lib.UUID(str(value)))
+        except ValueError:
+            return str(value or "").strip()
+
+    @classmethod
+    def record(cls, data, error, digest="") -> None:
+        uuid = cls.normalize_uuid(data.get("invoiceUniqueIdentifier")) or digest
+        values = {
+            "invoice_number": str(data.get("invoiceNumber") or "")[:100],
+            "payload": data,
+            "error": f"{type(error).__name__}: {error}",
+            "last_failed_at": timezone.now(),
+        }
+        updated = cls.objects.filter(uuid=uuid).update(attempts=F("attempts") + 1, **values)
+        if not updated:
+            cls.objects.create(uuid=uuid, **values)
+
+    @classmethod
+    def resolve(cls, uuid) -> None:
+        cls.objects.filter(uuid=cls.normalize_uuid(uuid)).delete()
+
+    def __str__(self) -> str:
+        return f"{self.invoice_number or self.uuid} ({self.attempts} attempts)"
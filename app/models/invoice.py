@@ -1,12 +1,18 @@
 from __future__ import annotations
+import threading
 import uuid
+from contextlib import contextmanager
 
 from django.core.exceptions import ValidationError
 from django.db import models
 from django.db.models import F, Q, Sum
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
 
 from .seller import Seller
 from .customer import Customer
+from .qr_code import QrCode
+from .invoice_number_sequence import InvoiceNumberSequence
 
 
 STATUS_DRAFT = "DRAFT"
@@ -22,6 +28,22 @@ STATUS_CHOICES = [
 ]
 
 
+_deferred = threading.local()
+
+
+class _DeferredTotals:
+    """One ``Invoice.deferred_totals`` block and the invoices it has absorbed."""
+
+    def __init__(self, invoice=None):
+        self.invoice = invoice
+        self.touched = {}
+
+    def covers(self, invoice) -> bool:
+        if self.invoice is None or invoice is self.invoice:
+            return True
+        return invoice.pk is not None and invoice.pk == self.invoice.pk
+
+
 class Invoice(models.Model):
     """Represents a customer invoice."""
 
@@ -50,8 +72,8 @@ class Invoice(models.Model):
 
     # JOFotara API fields
     xml = models.TextField(null=True, blank=True)
-    qr_base64 = models.TextField(null=True, blank=True)
-    qr_image = models.ImageField(upload_to='invoices/qr/', null=True, blank=True)
+    qr_code = models.ForeignKey(QrCode, on_delete=models.SET_NULL, null=True, blank=True, related_name="invoices")
+    payload_hash = models.CharField(max_length=64, null=True, blank=True, editable=False)
     e_invoice_number = models.CharField(max_length=50, null=True, blank=True)
     invoice_type = models.CharField(max_length=50, null=True, blank=True)
     sequence_income_number = models.CharField(max_length=50, null=True, blank=True)
@@ -63,6 +85,14 @@ class Invoice(models.Model):
 
     class Meta:
         ordering = ["-issue_date"]
+        indexes = [
+            # customer.invoices.order_by("-issue_date", "-invoice_number") in the desktop dialogs
+            models.Index(fields=["customer", "-issue_date", "-invoice_number"], name="invoice_customer_recent_idx"),
+            # InvoiceAdmin list filters combined with its issue_date hierarchy
+            models.Index(fields=["status", "issue_date"], name="invoice_status_date_idx"),
+            models.Index(fields=["payment_method", "issue_date"], name="invoice_payment_date_idx"),
+            models.Index(fields=["-issue_date"], name="invoice_issue_date_idx"),
+        ]
         constraints = [
             models.CheckConstraint(check=Q(subtotal__gte=0), name="subtotal_non_negative"),
             models.CheckConstraint(check=Q(discount_total__gte=0), name="discount_non_negative"),
@@ -92,44 +122,96 @@ class Invoice(models.Model):
         self.discount_total = totals.get("discount_total") or 0
         self.total_due = self.subtotal - self.discount_total
 
-    @staticmethod
-    def generate_next_invoice_number() -> str:
+    @classmethod
+    @contextmanager
+    def deferred_totals(cls, invoice: "Invoice | None" = None):
         """
-        Generate the next invoice number in the format EIN00001, EIN00002, ...
-        based on the highest existing EIN number.
+        Recalculate totals and loyalty once, when the block exits.
+
+        Inside the block, saving ``invoice`` or any of its line items skips
+        the aggregate, the totals UPDATE and the loyalty recount; they run
+        once on a clean exit. Without an ``invoice`` every invoice saved in
+        the block is deferred. Blocks nest; the outermost covering block
+        does the work. Thread-local, so concurrent requests do not interact.
         """
-        last_number = (
-            Invoice.objects.filter(invoice_number__startswith="EIN")
-            .order_by("-invoice_number")
-            .values_list("invoice_number", flat=True)
-            .first()
-        )
+        block = _DeferredTotals(invoice)
+        stack = _deferred.__dict__.setdefault("stack", [])
+        stack.append(block)
+        try:
+            yield block
+        finally:
+            stack.remove(block)
+
+        if invoice is not None and invoice.pk is not None:
+            block.touched.setdefault(invoice.pk, invoice)
+        for touched in block.touched.values():
+            touched.refresh_totals()
+
+    def _defer_totals(self) -> bool:
+        """Hand the recalculation to an enclosing ``deferred_totals`` block, if any."""
+        for block in reversed(getattr(_deferred, "stack", ())):
+            if block.covers(self):
+                block.touched.setdefault(self.pk, self)
+                return True
+        return False
+
+    def refresh_totals(self) -> None:
+        """Recalculate and store the totals, then the customer's loyalty status."""
+        if self._defer_totals():
+            return
+
+        self.update_totals()
+        super().save(update_fields=["subtotal", "discount_total", "total_due"])
 
-        if not last_number:
-            return "EIN00001"
+        if self.customer:
+            self.customer.update_loyalty_status_from_invoices()
 
-        numeric_part = int(last_number.replace("EIN", ""))
-        next_number = numeric_part + 1
-        return f"EIN{next_number:05d}"
+    @staticmethod
+    def generate_next_invoice_number() -> str:
+        """
+        Reserve the next invoice number in the format EIN00001, EIN00002, ...
+        from the invoice number sequence.
+        """
+        return InvoiceNumberSequence.next_number()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored customer so a reassignment can move the count.
+        instance._stored_customer_id = instance.__dict__.get("customer_id")
+        return instance
+
+    def _sync_customer_counts(self, adding: bool, update_fields) -> None:
+        if adding:
+            Customer.adjust_invoice_count(self.customer_id, 1)
+            if self.customer_id is not None and Invoice.customer.is_cached(self):
+                self.customer.invoice_count += 1
+        elif update_fields is None or "customer" in update_fields:
+            previous = getattr(self, "_stored_customer_id", self.customer_id)
+            if previous != self.customer_id:
+                Customer.adjust_invoice_count(previous, -1)
+                Customer.adjust_invoice_count(self.customer_id, 1)
+        self._stored_customer_id = self.customer_id
 
     def save(self, *args, **kwargs):
         is_new = self.pk is None
+        adding = self._state.adding
 
         # Auto-generate number only if missing
         if is_new and not self.invoice_number:
             self.invoice_number = Invoice.generate_next_invoice_number()
+        elif is_new:
+            # Numbers typed in by hand must not be handed out again later.
+            InvoiceNumberSequence.observe(self.invoice_number)
 
         super().save(*args, **kwargs)
+        self._sync_customer_counts(adding, kwargs.get("update_fields"))
 
         # mark for line-items so they know this is the creation cycle
         self._during_creation = is_new
 
         # keep totals in sync
-        self.update_totals()
-        super().save(update_fields=["subtotal", "discount_total", "total_due"])
-        
-        if self.customer:
-            self.customer.update_loyalty_status_from_invoices()
+        self.refresh_totals()
 
     @property
     def is_locked(self) -> bool:
@@ -140,4 +222,10 @@ class Invoice(models.Model):
         return self.status == STATUS_ISSUED
 
     def __str__(self):
-        return f"Invoice {self.invoice_number}"
\ No newline at end of file
+        return f"Invoice {self.invoice_number}"
+
+
+@receiver(post_delete, sender=Invoice)
+def _decrement_customer_invoice_count(sender, instance, **kwargs):
+    # Covers queryset and admin bulk deletes, which bypass Invoice.delete().
+    Customer.adjust_invoice_count(instance.customer_id, -1)
\ No newline at end of file
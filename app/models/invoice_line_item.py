@@ -61,15 +61,37 @@ class InvoiceLineItem(models.Model):
         if self.discount_amount > self.line_subtotal:
             raise ValidationError("Discount amount cannot exceed the line subtotal.")
 
+    @classmethod
+    def bulk_create_for_invoice(cls, invoice, line_items):
+        """
+        Validate and insert ``line_items`` for ``invoice`` in one query.
+
+        Runs the same field validation, ``clean()`` and total calculation as
+        ``save()``, but recalculates the parent totals once instead of once
+        per line. Uniqueness and check constraints are left to the database.
+        """
+        line_items = list(line_items)
+        if not line_items:
+            return []
+
+        for line in line_items:
+            line.invoice = invoice
+            line.clean_fields(exclude=["invoice"])
+            line.clean()
+            line.calculate_totals()
+
+        created = cls.objects.bulk_create(line_items)
+        invoice.refresh_totals()
+        return created
+
     def save(self, *args, **kwargs):
         # validate first (clean() also calculates totals)
         self.full_clean()
         # ensure totals are persisted
         self.calculate_totals()
         super().save(*args, **kwargs)
-        # update parent invoice totals
-        self.invoice.update_totals()
-        self.invoice.save(update_fields=["subtotal", "discount_total", "total_due"])
+        # update parent invoice totals (once per block inside Invoice.deferred_totals)
+        self.invoice.refresh_totals()
     
     def __str__(self):
         return self.description
\ No newline at end of file
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import threading
+from contextlib import contextmanager
+
+from django.db import models, transaction
+from django.db.models import F
+
+
+class InvoiceNumberSequence(models.Model):
+    """
+    Counter behind generated invoice numbers (EIN00001, EIN00002, ...).
+
+    Numbers are handed out with an atomic ``UPDATE ... SET last_value =
+    last_value + n``, so concurrent admin users and workers never receive
+    the same number. The row is seeded once from the highest existing
+    number with its prefix.
+    """
+
+    DEFAULT = "EIN"
+
+    # Highest hand-entered value per prefix this process has committed past,
+    # so observing a lower number costs no query.
+    _observed = {}
+    _deferred = threading.local()
+
+    # The prefix of the numbers it generates, e.g. "EIN".
+    name = models.CharField(max_length=20, unique=True)
+    width = models.PositiveSmallIntegerField(default=5)
+    last_value = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Invoice number sequence"
+
+    def format(self, value: int) -> str:
+        return f"{self.name}{value:0{self.width}d}"
+
+    def parse(self, number: str) -> int | None:
+        """Numeric part of ``number`` if it belongs to this sequence."""
+        if not number or not number.startswith(self.name):
+            return None
+        digits = number[len(self.name):]
+        return int(digits) if digits.isdigit() else None
+
+    @classmethod
+    def for_name(cls, name: str = DEFAULT) -> "InvoiceNumberSequence":
+        sequence = cls.objects.filter(name=name).first()
+        if sequence is None:
+            sequence = cls._seed(name)
+        return sequence
+
+    @classmethod
+    def _seed(cls, name: str) -> "InvoiceNumberSequence":
+        # One-time scan for the highest number issued before the sequence existed.
+        from .invoice import Invoice
+
+        sequence = cls(name=name)
+        numbers = Invoice.objects.filter(invoice_number__startswith=name).values_list("invoice_number", flat=True)
+        last_value = max((sequence.parse(n) or 0 for n in numbers.iterator()), default=0)
+        sequence, _ = cls.objects.get_or_create(name=name, defaults={"last_value": last_value})
+        return sequence
+
+    @classmethod
+    def reserve_block(cls, size: int, name: str = DEFAULT) -> list[str]:
+        """Reserve ``size`` consecutive numbers for the caller alone."""
+        if size < 1:
+            return []
+        sequence = cls.for_name(name)
+        with transaction.atomic():
+            cls.objects.filter(pk=sequence.pk).update(last_value=F("last_value") + size)
+            end = cls.objects.filter(pk=sequence.pk).values_list("last_value", flat=True).get()
+        return [sequence.format(value) for value in range(end - size + 1, end + 1)]
+
+    @classmethod
+    def next_number(cls, name: str = DEFAULT) -> str:
+        return cls.reserve_block(1, name)[0]
+
+    @classmethod
+    def peek(cls, name: str = DEFAULT) -> str:
+        """The number ``next_number`` would most likely return, without reserving it."""
+        sequence = cls.for_name(name)
+        return sequence.format(sequence.last_value + 1)
+
+    @classmethod
+    def observe(cls, number: str, name: str = DEFAULT) -> None:
+        """Move the sequence past a number that was entered by hand."""
+        if not number or not number.startswith(name):
+            return
+        value = cls(name=name).parse(number)
+        if value is None or value <= cls._observed.get(name, 0):
+            return
+
+        pending = getattr(cls._deferred, "pending", None)
+        if pending is not None:
+            pending[name] = max(pending.get(name, 0), value)
+            return
+
+        sequence = cls.for_name(name)
+        cls.objects.filter(pk=sequence.pk, last_value__lt=value).update(last_value=value)
+        transaction.on_commit(lambda: cls._observed.__setitem__(name, max(cls._observed.get(name, 0), value)))
+
+    @classmethod
+    @contextmanager
+    def deferred_observations(cls):
+        """
+        Collect ``observe`` calls and apply only the highest number per
+        prefix, once, when the block exits without error.
+
+        Batch writers use this so the sequence row is updated (and, on
+        PostgreSQL, row-locked) once per batch rather than once per invoice.
+        """
+        if getattr(cls._deferred, "pending", None) is not None:
+            yield  # An enclosing block applies them.
+            return
+
+        cls._deferred.pending = {}
+        try:
+            yield
+            pending = cls._deferred.pending
+        finally:
+            cls._deferred.pending = None
+
+        for name, value in pending.items():
+            cls.observe(cls(name=name).format(value), name)
+
+    def __str__(self) -> str:
+        return f"{self.name} @ {self.format(self.last_value)}"
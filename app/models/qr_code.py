@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import base64
+import hashlib
+
+from django.core.files.base import ContentFile
+from django.db import models
+
+
+class QrCode(models.Model):
+    """
+    A JOFotara QR image stored once per distinct content.
+
+    The base64 text from the API is kept as received; the PNG file is only
+    decoded and written to storage the first time it is requested.
+    """
+
+    digest = models.CharField(max_length=64, unique=True, editable=False)
+    data = models.TextField(editable=False)
+    image = models.ImageField(upload_to="invoices/qr/", null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = "QR code"
+
+    @staticmethod
+    def strip_data_uri(value: str) -> str:
+        if value.startswith("data:image"):
+            _, value = value.split(",", 1)
+        return value
+
+    @classmethod
+    def for_payload(cls, value: str | None) -> "QrCode | None":
+        """Return the stored QR for ``value``, creating it on first sight."""
+        if not value:
+            return None
+
+        data = cls.strip_data_uri(value)
+        # Stored as received, like the text column it replaced; only decoding
+        # the image needs valid base64.
+        digest = hashlib.sha256(data.encode("utf-8")).hexdigest()
+        qr_code, _ = cls.objects.get_or_create(digest=digest, defaults={"data": data})
+        return qr_code
+
+    def ensure_image(self):
+        """Decode the PNG to storage if it has not been written yet."""
+        if not self.image:
+            self.image.save(
+                f"{self.digest}.png",
+                ContentFile(base64.b64decode(self.data)),
+                save=False,
+            )
+            self.save(update_fields=["image"])
+        return self.image
+
+    def __str__(self) -> str:
+        return self.digest[:12]
@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+from django.db import models
+
+
+class SyncState(models.Model):
+    """Watermark of the newest record ingested by an incremental sync."""
+
+    JOFOTARA_INVOICES = "jofotara_invoices"
+
+    key = models.CharField(max_length=100, unique=True)
+    last_issue_date = models.DateField(null=True, blank=True)
+    last_uuid = models.CharField(max_length=64, null=True, blank=True)
+    last_page = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Sync state"
+
+    @classmethod
+    def get_for(cls, key: str) -> "SyncState":
+        state, _ = cls.objects.get_or_create(key=key)
+        return state
+
+    @property
+    def has_watermark(self) -> bool:
+        return bool(self.last_uuid or self.last_issue_date)
+
+    def __str__(self) -> str:
+        return f"{self.key} @ {self.last_issue_date or '-'}"
@@ -0,0 +1,95 @@
+"""Date-range sharded backfill of historical JOFotara invoices."""
+from __future__ import annotations
+
+import logging
+from datetime import date, timedelta
+
+from app.models import BackfillShard
+from app.services.invoice_logic import IngestionIdentityMap, process_invoice_batch
+from app.services.invoice_sync import iter_batches, iter_invoice_details, skip_ingested
+from app.services.jofoatara_api import JofoataraClient
+
+logger = logging.getLogger(__name__)
+
+SHARD_PERIODS = ("month",)
+
+
+def month_ranges(since: date, until: date):
+    """Yield ``(first_day, last_day)`` for every calendar month touching ``since..until``."""
+    start = since
+    while start <= until:
+        next_month = (start.replace(day=1) + timedelta(days=32)).replace(day=1)
+        yield start, min(until, next_month - timedelta(days=1))
+        start = next_month
+
+
+def plan_shards(since: date, until: date) -> list[BackfillShard]:
+    """Create (or find) the checkpoint rows for a backfill window; finished shards are left out."""
+    shards = []
+    for date_from, date_to in month_ranges(since, until):
+        shard, _ = BackfillShard.objects.get_or_create(date_from=date_from, date_to=date_to)
+        if shard.status != BackfillShard.DONE:
+            shards.append(shard)
+    return shards
+
+
+def run_shard(shard_id, base_url=None, workers=1, batch_size=50):
+    """
+    Ingest every invoice issued inside one shard's date range.
+
+    Runs with its own ``JofoataraClient`` so it can live in a worker process.
+    The shard's ``last_page`` is advanced after each fully fetched page, and
+    paging resumes after it, so a killed backfill picks up where it stopped.
+    Invoices that fail to write are dead-lettered and do not hold the
+    checkpoint back; a failed detail fetch does. Returns ``(written, failed)``.
+    """
+    shard = BackfillShard.objects.get(pk=shard_id)
+    client = JofoataraClient(pool_size=workers, base_url=base_url)
+    client.ensure_login()
+    identities = IngestionIdentityMap().preload()
+
+    shard.status = BackfillShard.RUNNING
+    shard.save(update_fields=["status", "updated_at"])
+
+    written = failed = 0
+    fetch_failed = False
+    try:
+        pages = client.iter_invoice_pages(
+            start_page=shard.last_page + 1,
+            date_from=shard.date_from,
+            date_to=shard.date_to,
+        )
+        for page, items in pages:
+            payloads = []
+            for summary, payload, error in iter_invoice_details(client, skip_ingested([items]), workers=workers):
+                if error:
+                    fetch_failed = True
+                    failed += 1
+                    logger.error(f"❌ Failed to fetch invoice {summary['invoiceNumber']}: {error}")
+                else:
+                    payloads.append(payload)
+
+            page_written = 0
+            for batch in iter_batches(payloads, batch_size):
+                for _, invoice, error in process_invoice_batch(batch, identities=identities):
+                    if error:
+                        failed += 1
+                    elif invoice is not None:
+                        page_written += 1
+
+            written += page_written
+            shard.invoices += page_written
+            if not fetch_failed:
+                shard.last_page = page
+            shard.save(update_fields=["invoices", "last_page", "updated_at"])
+    except Exception:
+        logger.exception("Backfill shard %s stopped", shard)
+        shard.status = BackfillShard.FAILED
+        shard.failures += failed + 1
+        shard.save(update_fields=["status", "failures", "updated_at"])
+        return written, failed + 1
+
+    shard.status = BackfillShard.FAILED if fetch_failed else BackfillShard.DONE
+    shard.failures += failed
+    shard.save(update_fields=["status", "failures", "updated_at"])
+    return written, failed
@@ -0,0 +1,160 @@
+"""Bulk import of customers from CSV or JSON Lines files."""
+from __future__ import annotations
+
+import csv
+import json
+import re
+from pathlib import Path
+
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+from django.db.models import Q
+
+from app.models import Customer
+from app.services import search_index
+
+PHONE_RE = re.compile(r"^\d{10}$")
+IMPORT_FIELDS = ("name", "additional_id", "email", "phone_number", "address", "preferred_contact_method")
+
+
+class CustomerImportResult:
+    def __init__(self):
+        self.created = 0
+        self.rejected = []  # (row number, reason)
+
+    def reject(self, row_number, reason):
+        self.rejected.append((row_number, reason))
+
+
+def read_customer_rows(path):
+    """Yield ``(row_number, fields)`` from a ``.csv`` or ``.jsonl`` file."""
+    path = Path(path)
+    with path.open(encoding="utf-8-sig", newline="") as handle:
+        if path.suffix.lower() == ".csv":
+            for number, row in enumerate(csv.DictReader(handle), start=2):
+                yield number, row
+        else:
+            for number, line in enumerate(handle, start=1):
+                if line.strip():
+                    yield number, json.loads(line)
+
+
+def _normalize(raw):
+    fields = {name: raw.get(name) for name in IMPORT_FIELDS}
+    if fields["phone_number"] is None:
+        fields["phone_number"] = raw.get("phone")
+    for name, value in fields.items():
+        value = "" if value is None else str(value).strip()
+        fields[name] = value or None
+    fields["name"] = fields["name"] or ""
+    fields["preferred_contact_method"] = fields["preferred_contact_method"] or Customer.ContactMethod.NONE
+    return fields
+
+
+def _row_error(fields):
+    """The first rule ``Customer.full_clean`` would reject this row for, without touching the database."""
+    if not fields["name"]:
+        return "Customer name must be provided."
+    for name in IMPORT_FIELDS:
+        max_length = Customer._meta.get_field(name).max_length
+        if fields[name] and max_length and len(fields[name]) > max_length:
+            return f"{name} is longer than {max_length} characters."
+    if fields["email"]:
+        try:
+            validate_email(fields["email"])
+        except ValidationError:
+            return f"Invalid email {fields['email']!r}."
+    if fields["phone_number"] and not PHONE_RE.match(fields["phone_number"]):
+        return "Phone number must be exactly 10 digits."
+
+    method = fields["preferred_contact_method"]
+    if method not in Customer.ContactMethod.values:
+        return f"Unknown preferred contact method {method!r}."
+    if method == Customer.ContactMethod.EMAIL and not fields["email"]:
+        return "Email is required when preferred contact method is Email."
+    if method in (Customer.ContactMethod.SMS, Customer.ContactMethod.PHONE) and not fields["phone_number"]:
+        return "Phone number is required when preferred contact method is SMS or Phone."
+    return None
+
+
+def _existing_keys(batch):
+    """Emails and (name, phone) pairs already stored, in one query per batch."""
+    emails = {fields["email"] for _, fields in batch if fields["email"]}
+    phones = {fields["phone_number"] for _, fields in batch if fields["phone_number"]}
+    names = {fields["name"] for _, fields in batch if fields["phone_number"]}
+
+    query = Q(pk__in=[])
+    if emails:
+        query |= Q(email__in=emails)
+    if phones:
+        query |= Q(name__in=names, phone_number__in=phones)
+
+    stored_emails, stored_phones = set(), set()
+    for email, name, phone in Customer.objects.filter(query).values_list("email", "name", "phone_number"):
+        stored_emails.add(email)
+        stored_phones.add((name, phone))
+    return stored_emails, stored_phones
+
+
+def _import_batch(batch, result, seen_emails, seen_phones, loyalty_status, dry_run):
+    stored_emails, stored_phones = _existing_keys(batch)
+    customers = []
+
+    for number, fields in batch:
+        email, name_phone = fields["email"], (fields["name"], fields["phone_number"])
+        if email and (email in stored_emails or email in seen_emails):
+            result.reject(number, f"Email {email!r} already exists.")
+            continue
+        if fields["phone_number"] and (name_phone in stored_phones or name_phone in seen_phones):
+            result.reject(number, f"{fields['name']!r} with phone {fields['phone_number']} already exists.")
+            continue
+
+        if email:
+            seen_emails.add(email)
+        if fields["phone_number"]:
+            seen_phones.add(name_phone)
+        customers.append(Customer(loyalty_status=loyalty_status, **fields))
+
+    if not dry_run:
+        with transaction.atomic():
+            Customer.objects.bulk_create(customers)
+            # bulk_create sends no post_save; index the new rows explicitly.
+            search_index.enqueue(Customer, [customer.pk for customer in customers])
+    result.created += len(customers)
+
+
+def bulk_import_customers(rows, batch_size=1000, dry_run=False):
+    """
+    Validate and insert customers set-wise.
+
+    ``rows`` yields ``(row_number, fields)``, e.g. from ``read_customer_rows``.
+    Each row is checked against the same rules as ``Customer.clean`` and the
+    field validators in Python, and against stored customers with a single
+    uniqueness query per batch. Valid rows are inserted with ``bulk_create``,
+    one transaction per batch. Invalid or duplicate rows are reported in the
+    result instead of aborting the import.
+    """
+    result = CustomerImportResult()
+    # New customers have no invoices yet, so they all start in the same tier.
+    loyalty_status = Customer(name="-").calculate_loyalty_status(invoice_count=0)
+    seen_emails, seen_phones = set(), set()
+    batch = []
+
+    for number, raw in rows:
+        if not isinstance(raw, dict):
+            result.reject(number, f"Expected an object of customer fields, got {type(raw).__name__}.")
+            continue
+        fields = _normalize(raw)
+        error = _row_error(fields)
+        if error:
+            result.reject(number, error)
+            continue
+        batch.append((number, fields))
+        if len(batch) >= batch_size:
+            _import_batch(batch, result, seen_emails, seen_phones, loyalty_status, dry_run)
+            batch = []
+
+    if batch:
+        _import_batch(batch, result, seen_emails, seen_phones, loyalty_status, dry_run)
+    return result
@@ -0,0 +1,13 @@
+"""Setup shared by the process pools of the ingestion commands."""
+from __future__ import annotations
+
+from django.db import connections
+
+
+def init_worker():
+    """``ProcessPoolExecutor`` initializer for workers that use the ORM."""
+    # Forked workers must not share the parent's database connections.
+    import django
+
+    django.setup()
+    connections.close_all()
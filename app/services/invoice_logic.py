@@ -1,82 +1,144 @@
-import base64
+import hashlib
+import json
 import logging
 from datetime import datetime
-from django.core.files.base import ContentFile
 from django.db import transaction
-from app.models import Seller, Customer, Invoice, InvoiceLineItem
+from django.db.models.functions import Mod
+from app.models import Seller, Customer, Invoice, InvoiceLineItem, InvoiceNumberSequence, QrCode, FailedInvoicePayload
 
 logger = logging.getLogger(__name__)
 
 
-def process_invoice_payload(data):
-    """Convert Jofoatara JSON → Django ORM models."""
-    try:
-        with transaction.atomic():
-
-            # --- Seller ---
-            seller_info = data.get("sellerDTO", {})
-            seller, _ = Seller.objects.get_or_create(
-                tax_number=seller_info.get("taxNumber", ""),
-                defaults={
-                    "name": seller_info.get("name", ""),
-                    "mobile": seller_info.get("mobileNumber", ""),
-                },
-            )
-
-            # --- Customer (from buyerDTO) ---
-            customer_info = data.get("buyerDTO", {})
-            raw_name = customer_info.get("buyerName")
-
-            if not raw_name or not raw_name.strip():
-                return None
-
-            # Normalize name
-            name = " ".join(raw_name.split()).strip().title()
-
-            customer, _ = Customer.objects.get_or_create(
-                name=name,
-                defaults={"additional_id": customer_info.get("additionalcustomerId")},
-            )
-
-            # --- Invoice ---
-            issue_date = None
-            if data.get("issueDate"):
-                issue_date = datetime.strptime(data["issueDate"], "%d-%m-%Y").date()
-
-            invoice, _ = Invoice.objects.update_or_create(
-                uuid=data["invoiceUniqueIdentifier"],
-                defaults={
-                    "invoice_number": data["invoiceNumber"],
-                    "issue_date": issue_date,
-                    "currency_name": data.get("currencyEnum"),
-                    "total_due": data.get("totalPayableAmount") or 0,
-                    "seller": seller,
-                    "customer": customer,
-                    "status": data.get("invoiceStatus"),
-                    "xml": data.get("xml"),
-                    "qr_base64": data.get("qrCodeImage"),
-                    
-                },
-            )
-
-            # QR image
-            qr = data.get("qrCodeImage")
-            if qr:
-                if qr.startswith("data:image"):
-                    _, b64data = qr.split(",", 1)
-                else:
-                    b64data = qr
-
-                img_bytes = base64.b64decode(b64data)
-                filename = f"{invoice.invoice_number}_qr.png"
-                invoice.qr_image.save(filename, ContentFile(img_bytes), save=True)
-
-            # --- Line Items ---
-            InvoiceLineItem.objects.filter(invoice=invoice).delete()
-
-            for line in data.get("invoiceItemDTOList", []):
-                InvoiceLineItem.objects.create(
-                    invoice=invoice,
+def payload_digest(data):
+    """Stable SHA-256 of a JOFotara payload, independent of key order."""
+    canonical = json.dumps(data, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def normalize_buyer_name(raw_name):
+    return " ".join(raw_name.split()).strip().title()
+
+
+class IngestionIdentityMap:
+    """
+    Per-run cache of the Seller and Customer rows ingestion attaches invoices to.
+
+    Keys are the seller tax number and the normalized buyer name, i.e. the
+    same values ``get_or_create`` would match on. ``preload()`` fills the map
+    with one query per model; misses fall back to ``get_or_create`` and are
+    remembered once the surrounding transaction commits, so a rolled-back
+    insert never leaks into the cache.
+    """
+
+    def __init__(self):
+        self.sellers = {}
+        self.customers = {}
+
+    def preload(self):
+        self.sellers = {seller.tax_number: seller for seller in Seller.objects.all()}
+        self.customers = {}
+        for customer in Customer.objects.order_by("created_at"):
+            self.customers.setdefault(customer.name, customer)
+        return self
+
+    def seller(self, tax_number, defaults):
+        seller = self.sellers.get(tax_number)
+        if seller is None:
+            seller, _ = Seller.objects.get_or_create(tax_number=tax_number, defaults=defaults)
+            self._remember(self.sellers, tax_number, seller)
+        return seller
+
+    def customer(self, name, defaults):
+        customer = self.customers.get(name)
+        if customer is None:
+            customer, _ = Customer.objects.get_or_create(name=name, defaults=defaults)
+            self._remember(self.customers, name, customer)
+        return customer
+
+    def seller_for(self, data):
+        seller_info = data.get("sellerDTO", {})
+        return self.seller(
+            seller_info.get("taxNumber", ""),
+            defaults={
+                "name": seller_info.get("name", ""),
+                "mobile": seller_info.get("mobileNumber", ""),
+            },
+        )
+
+    def customer_for(self, data):
+        """Customer named by ``buyerDTO``, or None when the payload has no buyer name."""
+        customer_info = data.get("buyerDTO", {})
+        raw_name = customer_info.get("buyerName")
+
+        if not raw_name or not raw_name.strip():
+            return None
+
+        return self.customer(
+            normalize_buyer_name(raw_name),
+            defaults={"additional_id": customer_info.get("additionalcustomerId")},
+        )
+
+    @staticmethod
+    def _remember(cache, key, obj):
+        transaction.on_commit(lambda: cache.setdefault(key, obj))
+
+
+def ingest_invoice_payload(data, identities=None):
+    """
+    Write one JOFotara payload; the caller owns the transaction.
+
+    Raises on invalid data. Returns None when the payload has no buyer.
+    """
+    if identities is None:
+        identities = IngestionIdentityMap()
+
+    # --- Unchanged payload: nothing to rewrite ---
+    digest = payload_digest(data)
+    unchanged = Invoice.objects.filter(
+        uuid=data["invoiceUniqueIdentifier"], payload_hash=digest
+    ).first()
+    if unchanged:
+        return unchanged
+
+    # --- Seller ---
+    seller = identities.seller_for(data)
+
+    # --- Customer (from buyerDTO) ---
+    customer = identities.customer_for(data)
+    if customer is None:
+        FailedInvoicePayload.resolve(data["invoiceUniqueIdentifier"])
+        return None
+
+    # --- Invoice ---
+    issue_date = None
+    if data.get("issueDate"):
+        issue_date = datetime.strptime(data["issueDate"], "%d-%m-%Y").date()
+
+    # Totals and loyalty are recalculated once, after the lines are in.
+    with Invoice.deferred_totals():
+        invoice, _ = Invoice.objects.update_or_create(
+            uuid=data["invoiceUniqueIdentifier"],
+            defaults={
+                "invoice_number": data["invoiceNumber"],
+                "issue_date": issue_date,
+                "currency_name": data.get("currencyEnum"),
+                "total_due": data.get("totalPayableAmount") or 0,
+                "seller": seller,
+                "customer": customer,
+                "status": data.get("invoiceStatus"),
+                "xml": data.get("xml"),
+                "qr_code": QrCode.for_payload(data.get("qrCodeImage")),
+                "payload_hash": digest,
+            },
+        )
+
+        # --- Line Items ---
+        InvoiceLineItem.objects.filter(invoice=invoice).delete()
+
+        InvoiceLineItem.bulk_create_for_invoice(
+            invoice,
+            (
+                InvoiceLineItem(
                     item=None,
                     description=line.get("productDescription", "Unknown"),
                     quantity=line.get("quantity", 1),
@@ -84,10 +146,92 @@ def process_invoice_payload(data):
                     discount_amount=line.get("discountAmount", 0),
                     line_subtotal=line.get("subtotalAmount", 0),
                 )
+                for line in data.get("invoiceItemDTOList", [])
+            ),
+        )
+
+    FailedInvoicePayload.resolve(invoice.uuid)
+    return invoice
+
+
+def dead_letter(data, error):
+    """Keep a payload that failed to ingest so ``redrive_invoices`` can retry it."""
+    try:
+        with transaction.atomic():
+            FailedInvoicePayload.record(data, error, digest=payload_digest(data))
+    except Exception:
+        logger.exception("Could not store failed payload %s", data.get("invoiceNumber"))
 
-            return invoice
+
+def process_invoice_payload(data, identities=None):
+    """Convert Jofoatara JSON → Django ORM models."""
+    try:
+        with transaction.atomic():
+            return ingest_invoice_payload(data, identities)
 
     except Exception as e:
         inv = data.get("invoiceNumber") or "UNKNOWN"
         logger.error(f"❌ Failed to process invoice {inv}: {e}", exc_info=True)
-        return None
\ No newline at end of file
+        dead_letter(data, e)
+        return None
+
+
+def process_invoice_batch(payloads, identities=None):
+    """
+    Write several payloads in a single transaction (one commit).
+
+    If anything in the batch fails, the batch is rolled back and written
+    again with a savepoint per invoice, so only the bad payloads are lost.
+    Returns ``(payload, invoice, error)`` for each payload, in order.
+    """
+    if identities is None:
+        identities = IngestionIdentityMap()
+
+    try:
+        with transaction.atomic(), InvoiceNumberSequence.deferred_observations():
+            return [(data, ingest_invoice_payload(data, identities), None) for data in payloads]
+    except Exception:
+        pass
+
+    results = []
+    with transaction.atomic(), InvoiceNumberSequence.deferred_observations():
+        for data in payloads:
+            try:
+                with transaction.atomic():
+                    results.append((data, ingest_invoice_payload(data, identities), None))
+            except Exception as e:
+                inv = data.get("invoiceNumber") or "UNKNOWN"
+                logger.error(f"❌ Failed to process invoice {inv}: {e}", exc_info=True)
+                dead_letter(data, e)
+                results.append((data, None, e))
+    return results
+
+
+def redrive_failed_payloads(shard=0, shard_count=1, max_attempts=None):
+    """
+    Retry dead-lettered payloads, oldest first.
+
+    Rows are split between shards by primary key so parallel workers never
+    retry the same invoice. A success removes the row; another failure bumps
+    its attempt count. Returns ``(recovered, failed)``.
+    """
+    pending = FailedInvoicePayload.objects.all()
+    if max_attempts:
+        pending = pending.filter(attempts__lt=max_attempts)
+    if shard_count > 1:
+        pending = pending.annotate(shard=Mod("id", shard_count)).filter(shard=shard)
+
+    identities = IngestionIdentityMap().preload()
+    recovered = failed = 0
+    for pk, payload in list(pending.values_list("pk", "payload")):
+        try:
+            with transaction.atomic():
+                ingest_invoice_payload(payload, identities)
+                # Rows keyed by digest are not found by the uuid in resolve().
+                FailedInvoicePayload.objects.filter(pk=pk).delete()
+            recovered += 1
+        except Exception as e:
+            logger.error(f"❌ Re-drive failed for invoice {payload.get('invoiceNumber')}: {e}")
+            dead_letter(payload, e)
+            failed += 1
+    return recovered, failed
@@ -0,0 +1,261 @@
+"""Helpers for syncing JOFotara invoices into the local database."""
+from __future__ import annotations
+
+import queue
+import threading
+import time
+import uuid as uuid_lib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from app.models import Invoice, SyncState
+
+JOFOTARA_DATE_FORMAT = "%d-%m-%Y"
+
+
+def parse_jofotara_date(value):
+    """Parse a JOFotara ``dd-mm-YYYY`` date, returning None when absent or malformed."""
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, JOFOTARA_DATE_FORMAT).date()
+    except (TypeError, ValueError):
+        return None
+
+
+class SyncStats:
+    """Thread-safe timings collected while a sync runs."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.finished = None
+        self.detail_latencies = []
+        self.queue_depths = []
+        self.write_seconds = 0.0
+        self.written = 0
+        self.batches = 0
+        self._lock = threading.Lock()
+
+    def record_detail(self, seconds):
+        with self._lock:
+            self.detail_latencies.append(seconds)
+
+    def record_queue_depth(self, depth):
+        self.queue_depths.append(depth)
+
+    def record_write(self, seconds, count=1):
+        self.write_seconds += seconds
+        self.written += count
+        self.batches += 1
+
+    def finish(self):
+        self.finished = time.perf_counter()
+
+    @property
+    def elapsed(self):
+        return (self.finished or time.perf_counter()) - self.started
+
+    def latency_percentile(self, pct):
+        if not self.detail_latencies:
+            return 0.0
+        ordered = sorted(self.detail_latencies)
+        index = min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))
+        return ordered[index]
+
+    def summary(self):
+        elapsed = self.elapsed
+        return {
+            "invoices": self.written,
+            "elapsed_s": elapsed,
+            "invoices_per_s": self.written / elapsed if elapsed else 0.0,
+            "detail_p50_ms": self.latency_percentile(50) * 1000,
+            "detail_p99_ms": self.latency_percentile(99) * 1000,
+            "db_write_s": self.write_seconds,
+            "db_write_per_invoice_ms": (
+                self.write_seconds / self.written * 1000 if self.written else 0.0
+            ),
+            "db_batches": self.batches,
+            "fetched_per_s": len(self.detail_latencies) / elapsed if elapsed else 0.0,
+            "written_per_db_s": self.written / self.write_seconds if self.write_seconds else 0.0,
+            "queue_depth_avg": (
+                sum(self.queue_depths) / len(self.queue_depths) if self.queue_depths else 0.0
+            ),
+            "queue_depth_max": max(self.queue_depths, default=0),
+        }
+
+
+def _fetch_detail(client, summary, stats=None):
+    started = time.perf_counter()
+    try:
+        return client.fetch_invoice(
+            summary["invoiceUniqueIdentifier"],
+            summary["invoiceNumber"],
+        )
+    finally:
+        if stats is not None:
+            # Prefer the client's own round-trip time, which leaves out rate
+            # limiter, concurrency and retry waits.
+            latency = getattr(client, "last_latency", None)
+            stats.record_detail(latency if latency is not None else time.perf_counter() - started)
+
+
+def iter_invoice_details(client, summaries, workers=1, max_in_flight=None, stats=None):
+    """
+    Yield ``(summary, payload, error)`` for every invoice summary.
+
+    With ``workers > 1`` the detail requests run on a bounded thread pool that
+    shares ``client.session`` (and therefore its connection pool). Workers
+    push finished payloads onto a queue which is drained here, on the calling
+    thread, so all database writes stay on a single writer; results arrive
+    in completion order. At most ``max_in_flight`` invoices are requested or
+    waiting in the queue at any time, so ``summaries`` may be a lazy
+    iterator. Detail latencies and queue depth are recorded on ``stats``
+    when given.
+    """
+    if workers <= 1:
+        for summary in summaries:
+            try:
+                yield summary, _fetch_detail(client, summary, stats), None
+            except Exception as e:
+                yield summary, None, e
+        return
+
+    max_in_flight = max_in_flight or workers * 2
+    summaries = iter(summaries)
+    results = queue.Queue()
+    outstanding = 0
+    source_error = None
+
+    def fetch(summary):
+        try:
+            results.put((summary, _fetch_detail(client, summary, stats), None))
+        except Exception as e:
+            results.put((summary, None, e))
+
+    def submit_next():
+        # ``summaries`` may be streaming pages from the API; if it fails we
+        # stop submitting, drain what is already in flight and re-raise.
+        nonlocal outstanding, source_error
+        if source_error is not None:
+            return False
+        try:
+            summary = next(summaries)
+        except StopIteration:
+            return False
+        except Exception as e:
+            source_error = e
+            return False
+        pool.submit(fetch, summary)
+        outstanding += 1
+        return True
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="jofotara") as pool:
+        while outstanding < max_in_flight and submit_next():
+            pass
+
+        while outstanding:
+            result = results.get()
+            outstanding -= 1
+            if stats is not None:
+                stats.record_queue_depth(results.qsize())
+
+            # Refill the window before handing the result to the writer so
+            # the network stays busy while the caller touches the database.
+            submit_next()
+            yield result
+
+    if source_error is not None:
+        raise source_error
+
+
+def iter_batches(items, size):
+    """Group ``items`` into lists of at most ``size``."""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class SyncWatermark:
+    """
+    Tracks the newest invoice seen during a sync and decides where paging stops.
+
+    The JOFotara list endpoint returns invoices newest first, so once a run
+    reaches the stored watermark uuid (or an issue date older than it) every
+    remaining page has already been ingested.
+    """
+
+    def __init__(self, key=SyncState.JOFOTARA_INVOICES, full=False):
+        self.state = SyncState.get_for(key)
+        self.full = full
+        self.newest = None
+        self.newest_date = None
+        self.newest_page = 0
+
+    def reached(self, summary, page):
+        self.observe(summary, page)
+        if self.full or not self.state.has_watermark:
+            return False
+
+        if self.state.last_uuid and summary.get("invoiceUniqueIdentifier") == self.state.last_uuid:
+            return True
+
+        issue_date = parse_jofotara_date(summary.get("issueDate"))
+        return bool(
+            issue_date and self.state.last_issue_date and issue_date < self.state.last_issue_date
+        )
+
+    def observe(self, summary, page):
+        issue_date = parse_jofotara_date(summary.get("issueDate"))
+        if self.newest is None or (
+            issue_date and (self.newest_date is None or issue_date > self.newest_date)
+        ):
+            self.newest = summary
+            self.newest_date = issue_date
+            self.newest_page = page
+
+    def save(self):
+        """Advance the stored watermark; call only after a complete run."""
+        if self.newest is None:
+            return
+        if self.state.last_issue_date and self.newest_date and self.newest_date < self.state.last_issue_date:
+            return
+
+        self.state.last_uuid = self.newest.get("invoiceUniqueIdentifier")
+        self.state.last_issue_date = self.newest_date
+        self.state.last_page = self.newest_page
+        self.state.save()
+
+
+def skip_ingested(pages):
+    """
+    Yield summaries from ``pages`` that are new or whose status changed.
+
+    ``pages`` is an iterable of summary lists (for example the pages from
+    ``JofoataraClient.iter_invoice_pages``); stored invoices are looked up
+    with one query per page.
+    """
+    for chunk in pages:
+        uuids = {}
+        for summary in chunk:
+            try:
+                uuids[summary["invoiceUniqueIdentifier"]] = uuid_lib.UUID(
+                    str(summary["invoiceUniqueIdentifier"])
+                )
+            except ValueError:
+                pass
+
+        stored = dict(
+            Invoice.objects.filter(uuid__in=uuids.values()).values_list("uuid", "status")
+        )
+
+        for summary in chunk:
+            uuid = uuids.get(summary["invoiceUniqueIdentifier"])
+            if uuid not in stored:
+                yield summary
+            elif summary.get("invoiceStatus") and summary["invoiceStatus"] != stored[uuid]:
+                yield summary
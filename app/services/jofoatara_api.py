@@ -1,6 +1,86 @@
+import base64
+import hashlib
+import json
+import logging
 import os
+import threading
+import time
+from pathlib import Path
 import requests
 from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+from app.core.constants import REQUEST_TIMEOUT
+from app.services.rate_limit import AdaptiveConcurrency, TokenBucket, backoff_delay, parse_retry_after
+
+logger = logging.getLogger(__name__)
+
+
+class TokenCache:
+    """
+    Access tokens persisted to a JSON file, keyed per API root and account.
+
+    Lets consecutive runs reuse a still-valid bearer token instead of
+    logging in again. Entries are considered expired ``skew`` seconds early.
+    """
+
+    def __init__(self, path=None, skew=60):
+        self.path = Path(path or settings.JOFOTARA_TOKEN_CACHE)
+        self.skew = skew
+
+    def _read(self):
+        try:
+            return json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+    def _write(self, entries):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(entries), encoding="utf-8")
+        os.chmod(tmp, 0o600)
+        os.replace(tmp, self.path)
+
+    def load(self, key):
+        entry = self._read().get(key)
+        if not entry or entry.get("expires_at", 0) - self.skew <= time.time():
+            return None
+        return entry["access_token"]
+
+    def store(self, key, access_token, expires_at):
+        entries = {
+            k: v for k, v in self._read().items() if v.get("expires_at", 0) > time.time()
+        }
+        entries[key] = {"access_token": access_token, "expires_at": expires_at}
+        try:
+            self._write(entries)
+        except OSError as e:
+            logger.warning("Could not persist JOFotara token cache %s: %s", self.path, e)
+
+    def clear(self, key):
+        entries = self._read()
+        if entries.pop(key, None) is not None:
+            try:
+                self._write(entries)
+            except OSError as e:
+                logger.warning("Could not update JOFotara token cache %s: %s", self.path, e)
+
+
+def token_expiry(access_token, data, default_ttl):
+    """Epoch seconds when ``access_token`` expires: ``expires_in``, the JWT ``exp`` claim, or a default TTL."""
+    if data.get("expires_in"):
+        return time.time() + float(data["expires_in"])
+
+    parts = access_token.split(".")
+    if len(parts) == 3:
+        try:
+            claims = json.loads(base64.urlsafe_b64decode(parts[1] + "=" * (-len(parts[1]) % 4)))
+            if claims.get("exp"):
+                return float(claims["exp"])
+        except (ValueError, TypeError, AttributeError):
+            pass
+
+    return time.time() + default_ttl
 
 
 class JofoataraClient:
@@ -9,86 +89,244 @@ class JofoataraClient:
     LOGIN_ENDPOINT = "/users/auth/login"
     INVOICE_LIST_ENDPOINT = "/sme/invoices/"
     INVOICE_DETAILS_ENDPOINT = "/sme/invoices/{uuid}/{number}"
+    # Issue-date filters on the list endpoint (inclusive, dd-mm-YYYY).
+    DATE_FROM_PARAM = "issueDateFrom"
+    DATE_TO_PARAM = "issueDateTo"
+    DATE_FORMAT = "%d-%m-%Y"
+
+    # Responses worth retrying: throttling and transient server errors.
+    RETRY_STATUSES = {429, 500, 502, 503, 504}
 
-    def __init__(self):
+    def __init__(
+        self,
+        pool_size=10,
+        base_url=None,
+        max_retries=None,
+        rate_limit=None,
+        latency_target=None,
+        token_cache=None,
+    ):
         self.tax_number = os.getenv("JOFOTARA_TAX_NUMBER")
         self.username = os.getenv("JOFOTARA_USERNAME")
         self.password = os.getenv("JOFOTARA_PASSWORD")
+        self.base_url = (base_url or self.BASE_URL).rstrip("/")
 
+        # One keep-alive pool shared by every thread that uses this client;
+        # size it to the number of concurrent requests we intend to make.
         self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
         self.access_token = None
+        self.token_cache = token_cache or TokenCache()
+        self.token_ttl = float(os.getenv("JOFOTARA_TOKEN_TTL", 1800))
+        self._auth_lock = threading.Lock()
+        self._timing = threading.local()
+
+        # Adaptive in-flight limit, plus an optional requests/second ceiling
+        # when one is configured; both back off on 429, 5xx, connection errors
+        # and slow responses, then creep back up.
+        self.max_retries = int(max_retries if max_retries is not None else os.getenv("JOFOTARA_MAX_RETRIES", 5))
+        rate_limit = rate_limit or float(os.getenv("JOFOTARA_RATE_LIMIT") or 0)
+        self.rate_limiter = TokenBucket(rate_limit) if rate_limit else None
+        self.concurrency = AdaptiveConcurrency(
+            initial=pool_size,
+            latency_target=latency_target or float(os.getenv("JOFOTARA_LATENCY_TARGET", 5)),
+        )
+
+    # --------------------------------------------------------------------
+    # REQUESTS (Rate limited, retried with backoff)
+    # --------------------------------------------------------------------
+    @property
+    def last_latency(self):
+        """Seconds the last HTTP round trip made by this thread took, waits excluded."""
+        return getattr(self._timing, "latency", None)
+
+    def _request(self, method, url, reauth=True, **kwargs):
+        """
+        Send a request through the rate limiter and adaptive concurrency limit.
+
+        Throttling responses, 5xx and connection errors are retried up to
+        ``max_retries`` times with jittered exponential backoff, honouring
+        Retry-After. A 401 triggers one transparent re-login and retry when
+        ``reauth`` is set. The last response is returned (or the last
+        connection error raised) once retries are exhausted.
+        """
+        kwargs.setdefault("timeout", REQUEST_TIMEOUT)
+        self._timing.latency = None
+
+        for attempt in range(self.max_retries + 1):
+            token = self.access_token
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            self.concurrency.acquire()
+            started = time.monotonic()
+            response = error = None
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+            finally:
+                latency = self._timing.latency = time.monotonic() - started
+                congested = response is None or response.status_code in self.RETRY_STATUSES
+                self.concurrency.release(congested=congested, latency=latency)
+
+            if not congested:
+                if self.rate_limiter is not None:
+                    self.rate_limiter.reward()
+                if response.status_code == 401 and reauth:
+                    reauth = False
+                    self._relogin(token)
+                    continue
+                return response
+
+            if self.rate_limiter is not None:
+                self.rate_limiter.penalize()
+            if attempt == self.max_retries:
+                break
+
+            retry_after = parse_retry_after(response.headers.get("Retry-After")) if response is not None else None
+            delay = backoff_delay(attempt, retry_after=retry_after)
+            logger.warning(
+                "JOFotara %s %s failed (%s); retry %d/%d in %.1fs",
+                method, url, error or response.status_code, attempt + 1, self.max_retries, delay,
+            )
+            time.sleep(delay)
+
+        if error is not None:
+            raise error
+        return response
 
     # --------------------------------------------------------------------
     # LOGIN
     # --------------------------------------------------------------------
+    @property
+    def _token_key(self):
+        raw = f"{self.base_url}|{self.tax_number}|{self.username}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _use_token(self, access_token):
+        self.access_token = access_token
+        self.session.headers.update({"Authorization": f"Bearer {self.access_token}"})
+
+    def ensure_login(self):
+        """Reuse a cached, unexpired token when there is one; otherwise log in."""
+        cached = self.token_cache.load(self._token_key)
+        if cached:
+            self._use_token(cached)
+            return True
+        return self.login()
+
+    def _relogin(self, rejected_token):
+        # Several workers can hit 401 at once; only the first logs in again,
+        # the rest retry with the token it obtained.
+        with self._auth_lock:
+            if self.access_token == rejected_token:
+                logger.info("JOFotara token rejected; logging in again.")
+                self.token_cache.clear(self._token_key)
+                self.login()
+
     def login(self):
-        url = self.BASE_URL + self.LOGIN_ENDPOINT
+        url = self.base_url + self.LOGIN_ENDPOINT
         payload = {
             "taxNumber": self.tax_number,
             "username": self.username,
             "password": self.password,
         }
 
-        response = self.session.post(
+        response = self._request(
+            "POST",
             url,
+            reauth=False,
             json=payload,
             headers={"Content-Type": "application/json"},
-            timeout=15,
         )
 
         if response.status_code != 200:
             raise Exception(f"Login failed: {response.status_code} {response.text}")
 
         data = response.json()
-        self.access_token = data.get("access_token")
+        access_token = data.get("access_token")
 
-        if not self.access_token:
+        if not access_token:
             raise Exception("Login succeeded but no access_token returned.")
 
-        self.session.headers.update({"Authorization": f"Bearer {self.access_token}"})
+        self._use_token(access_token)
+        self.token_cache.store(
+            self._token_key,
+            access_token,
+            token_expiry(access_token, data, self.token_ttl),
+        )
         return True
 
     # --------------------------------------------------------------------
     # FETCH INVOICE LIST (Paginated)
     # --------------------------------------------------------------------
-    def fetch_invoice_list(self, page=1):
-        url = self.BASE_URL + self.INVOICE_LIST_ENDPOINT
+    def fetch_invoice_list(self, page=1, date_from=None, date_to=None):
+        url = self.base_url + self.INVOICE_LIST_ENDPOINT
         params = {"page": page}
+        if date_from:
+            params[self.DATE_FROM_PARAM] = date_from.strftime(self.DATE_FORMAT)
+        if date_to:
+            params[self.DATE_TO_PARAM] = date_to.strftime(self.DATE_FORMAT)
 
-        response = self.session.get(url, params=params, timeout=15)
+        response = self._request("GET", url, params=params)
         response.raise_for_status()
 
         return response.json()
     
     
     # --------------------------------------------------------------------
-    # FETCH ALL INVOICES (Handles Pagination)
+    # ITERATE INVOICES (Streams pages lazily)
     # --------------------------------------------------------------------
-    def fetch_all_invoices(self):
-        page = 1
-        all_items = []
+    def iter_invoice_pages(self, stop_at=None, start_page=1, date_from=None, date_to=None):
+        """
+        Yield ``(page, summaries)`` one page at a time.
+
+        Only the current page is held in memory. ``stop_at(summary, page)``
+        may return True to stop paging at an already-ingested invoice; that
+        summary and everything after it is left out. ``date_from`` and
+        ``date_to`` restrict the listing to an issue-date range.
+        """
+        page = start_page
 
         while True:
-            data = self.fetch_invoice_list(page=page)
+            data = self.fetch_invoice_list(page=page, date_from=date_from, date_to=date_to)
             items = data.get("invoiceList", [])
             if not items:
-                break  # No more pages
+                return  # No more pages
 
-            all_items.extend(items)
+            if stop_at:
+                for index, item in enumerate(items):
+                    if stop_at(item, page):
+                        if index:
+                            yield page, items[:index]
+                        return
+
+            yield page, items
             page += 1
 
-        return all_items
+    def iter_invoices(self, stop_at=None):
+        """Yield invoice summaries page by page; see ``iter_invoice_pages``."""
+        for _, items in self.iter_invoice_pages(stop_at=stop_at):
+            yield from items
+
+    # --------------------------------------------------------------------
+    # FETCH ALL INVOICES (Handles Pagination)
+    # --------------------------------------------------------------------
+    def fetch_all_invoices(self, stop_at=None):
+        return list(self.iter_invoices(stop_at=stop_at))
 
     # --------------------------------------------------------------------
     # FETCH INVOICE DETAILS
     # --------------------------------------------------------------------
     def fetch_invoice(self, uuid, number):
-        url = self.BASE_URL + self.INVOICE_DETAILS_ENDPOINT.format(
+        url = self.base_url + self.INVOICE_DETAILS_ENDPOINT.format(
             uuid=uuid,
             number=number,
         )
 
-        response = self.session.get(url, timeout=15)
+        response = self._request("GET", url)
         response.raise_for_status()
 
         return response.json()
\ No newline at end of file
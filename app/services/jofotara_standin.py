@@ -0,0 +1,227 @@
+"""Local stand-in for the JOFotara API, used for benchmarks and offline testing."""
+from __future__ import annotations
+
+import json
+import random
+import re
+import secrets
+import threading
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# 1x1 transparent PNG, so ingestion exercises the QR path.
+QR_PNG_BASE64 = (
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNk+M9QDwADhgGAWjR9awAAAABJRU5ErkJggg=="
+)
+STANDIN_NAMESPACE = uuid.UUID("6c1f3d52-1f3e-4a53-9d0a-3f1f5b0e7a10")
+STANDIN_TAX_NUMBER = "STANDIN-0001"
+
+
+class StandinConfig:
+    """Shape of the fake data set and how slowly the server answers."""
+
+    def __init__(
+        self,
+        invoices=1000,
+        page_size=50,
+        lines_per_invoice=3,
+        customers=50,
+        list_latency_ms=0,
+        detail_latency_ms=0,
+        invoices_per_day=20,
+        first_day=date(2024, 1, 1),
+        error_rate=0.0,
+    ):
+        self.invoices = invoices
+        self.page_size = page_size
+        self.lines_per_invoice = lines_per_invoice
+        self.customers = customers
+        self.list_latency_ms = list_latency_ms
+        self.detail_latency_ms = detail_latency_ms
+        self.invoices_per_day = invoices_per_day
+        self.first_day = first_day
+        # Share of list/detail requests answered with 503 + Retry-After.
+        self.error_rate = error_rate
+
+
+def standin_uuid(index: int) -> str:
+    return str(uuid.uuid5(STANDIN_NAMESPACE, str(index)))
+
+
+def standin_customer_name(index: int) -> str:
+    return f"Standin Customer {index}"
+
+
+class StandinData:
+    """Deterministic invoices; index 0 is the oldest and lists are newest first."""
+
+    def __init__(self, config: StandinConfig):
+        self.config = config
+        self.by_uuid = {standin_uuid(i): i for i in range(config.invoices)}
+
+    def issue_date(self, index: int) -> date:
+        return self.config.first_day + timedelta(days=index // self.config.invoices_per_day)
+
+    def number(self, index: int) -> str:
+        return f"SIN{index:07d}"
+
+    def summary(self, index: int) -> dict:
+        return {
+            "invoiceUniqueIdentifier": standin_uuid(index),
+            "invoiceNumber": self.number(index),
+            "issueDate": self.issue_date(index).strftime("%d-%m-%Y"),
+            "invoiceStatus": "UNPAID",
+        }
+
+    def page(self, page: int, date_from: date | None = None, date_to: date | None = None) -> list[dict]:
+        per_day = self.config.invoices_per_day
+        newest = self.config.invoices - 1
+        oldest = 0
+        if date_to:
+            newest = min(newest, ((date_to - self.config.first_day).days + 1) * per_day - 1)
+        if date_from:
+            oldest = max(oldest, (date_from - self.config.first_day).days * per_day)
+
+        start = newest - (page - 1) * self.config.page_size
+        stop = max(start - self.config.page_size, oldest - 1)
+        return [self.summary(i) for i in range(start, stop, -1)]
+
+    def detail(self, index: int) -> dict:
+        lines = [
+            {
+                "productDescription": f"Standin item {line}",
+                "quantity": 1 + (index + line) % 4,
+                "unitPrice": 2.5 + line,
+                "discountAmount": 0.25 if line == 0 else 0,
+            }
+            for line in range(self.config.lines_per_invoice)
+        ]
+        return {
+            **self.summary(index),
+            "currencyEnum": "JOD",
+            "totalPayableAmount": 0,
+            "sellerDTO": {
+                "taxNumber": STANDIN_TAX_NUMBER,
+                "name": "Standin Seller",
+                "mobileNumber": "0790000000",
+            },
+            "buyerDTO": {"buyerName": standin_customer_name(index % self.config.customers)},
+            "qrCodeImage": QR_PNG_BASE64,
+            "invoiceItemDTOList": lines,
+        }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "JofotaraStandin"
+    DETAIL_PATH = re.compile(r"^/sme/invoices/(?P<uuid>[0-9a-f-]+)/(?P<number>[^/]+)/?$")
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body=None, headers=None):
+        payload = json.dumps(body if body is not None else {}).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _throttled(self):
+        with self.server.lock:
+            failing = self.server.random.random() < self.server.data.config.error_rate
+        if failing:
+            self._send(503, {"error": "try again"}, headers={"Retry-After": "0"})
+        return failing
+
+    def _authorized(self):
+        return self.headers.get("Authorization") == f"Bearer {self.server.access_token}"
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        self.rfile.read(length)
+        if urlparse(self.path).path != "/users/auth/login":
+            return self._send(404, {"error": "not found"})
+        with self.server.lock:
+            self.server.logins += 1
+        self._send(200, {"access_token": self.server.access_token, "expires_in": self.server.token_ttl})
+
+    def do_GET(self):
+        if not self._authorized():
+            return self._send(401, {"error": "unauthorized"})
+
+        if self._throttled():
+            return
+
+        url = urlparse(self.path)
+        config = self.server.data.config
+
+        if url.path.rstrip("/") == "/sme/invoices":
+            time.sleep(config.list_latency_ms / 1000)
+            query = parse_qs(url.query)
+            page = int(query.get("page", ["1"])[0])
+            date_from, date_to = (
+                datetime.strptime(query[name][0], "%d-%m-%Y").date() if name in query else None
+                for name in ("issueDateFrom", "issueDateTo")
+            )
+            return self._send(200, {"invoiceList": self.server.data.page(page, date_from, date_to)})
+
+        match = self.DETAIL_PATH.match(url.path)
+        if match and match["uuid"] in self.server.data.by_uuid:
+            time.sleep(config.detail_latency_ms / 1000)
+            return self._send(200, self.server.data.detail(self.server.data.by_uuid[match["uuid"]]))
+
+        self._send(404, {"error": "not found"})
+
+
+class JofotaraStandin(ThreadingHTTPServer):
+    """
+    Threaded HTTP server implementing the JOFotara login, list and detail endpoints.
+
+    Use as a context manager to serve from a background thread::
+
+        with JofotaraStandin(StandinConfig(invoices=500)) as standin:
+            client = JofoataraClient(base_url=standin.url)
+    """
+
+    daemon_threads = True
+
+    def __init__(self, config: StandinConfig | None = None, host="127.0.0.1", port=0):
+        super().__init__((host, port), _Handler)
+        self.data = StandinData(config or StandinConfig())
+        self.access_token = secrets.token_hex(16)
+        self.token_ttl = 3600
+        self.logins = 0
+        self.random = random.Random(0)
+        self.lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def rotate_token(self):
+        """Invalidate the issued token, as a server-side expiry would."""
+        self.access_token = secrets.token_hex(16)
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, name="jofotara-standin", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
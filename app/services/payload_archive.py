@@ -0,0 +1,141 @@
+"""Append-only archive of raw JOFotara payloads and offline replay."""
+from __future__ import annotations
+
+import gzip
+import json
+import logging
+import zlib
+from datetime import date, datetime
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from app.services.invoice_logic import IngestionIdentityMap, process_invoice_batch
+from app.services.invoice_sync import iter_batches
+
+logger = logging.getLogger(__name__)
+
+PARTITION_SUFFIX = ".ndjson.gz"
+
+
+class PayloadArchive:
+    """
+    Day-partitioned, gzip-compressed NDJSON archive of detail payloads.
+
+    Each day lives in ``<root>/<YYYY>/<YYYY-MM-DD>.ndjson.gz``. Files are only
+    ever appended to: every run adds a new gzip member, which ``gzip`` reads
+    back transparently as one stream. Not thread-safe; append from the
+    writer thread only.
+    """
+
+    def __init__(self, root=None):
+        self.root = Path(root or settings.JOFOTARA_ARCHIVE_DIR)
+        self._day = None
+        self._handle = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def path_for(self, day: date) -> Path:
+        return self.root / f"{day:%Y}" / f"{day:%Y-%m-%d}{PARTITION_SUFFIX}"
+
+    def append(self, payload, day: date | None = None) -> None:
+        day = day or timezone.localdate()
+        if day != self._day:
+            self.close()
+            path = self.path_for(day)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._handle = gzip.open(path, "at", encoding="utf-8")
+            self._day = day
+
+        self._handle.write(json.dumps(payload, ensure_ascii=False, separators=(",", ":")))
+        self._handle.write("\n")
+
+    def close(self) -> None:
+        if self._handle is not None:
+            self._handle.close()
+        self._handle = None
+        self._day = None
+
+    def partitions(self, since: date | None = None, until: date | None = None) -> list[Path]:
+        """Archive files in chronological order, optionally limited to a date range."""
+        found = []
+        for path in self.root.glob(f"*/*{PARTITION_SUFFIX}"):
+            try:
+                day = datetime.strptime(path.name[: -len(PARTITION_SUFFIX)], "%Y-%m-%d").date()
+            except ValueError:
+                continue
+            if (since and day < since) or (until and day > until):
+                continue
+            found.append((day, path))
+        return [path for _, path in sorted(found)]
+
+    @staticmethod
+    def read(path):
+        """Yield payloads from one partition, stopping at a truncated tail."""
+        with gzip.open(path, "rt", encoding="utf-8") as handle:
+            try:
+                for line in handle:
+                    if line.strip():
+                        yield json.loads(line)
+            except (EOFError, zlib.error, json.JSONDecodeError) as e:
+                # A run that died mid-write leaves a partial last member;
+                # everything before it is still valid.
+                logger.warning("Stopped reading %s at a damaged record: %s", path, e)
+
+
+def seed_identities(paths):
+    """
+    Create every seller and customer referenced by the archive up front.
+
+    Parallel replay workers each keep their own identity map; seeding first
+    means they only ever find these rows instead of racing to create the
+    same customer twice.
+    """
+    identities = IngestionIdentityMap().preload()
+    with transaction.atomic():
+        for path in paths:
+            for payload in PayloadArchive.read(path):
+                identities.seller_for(payload)
+                identities.customer_for(payload)
+
+
+def replay_shard(paths, shard=0, shard_count=1, batch_size=50):
+    """
+    Re-run ingestion over archived payloads, ``batch_size`` invoices per
+    transaction (see ``process_invoice_batch``).
+
+    Payloads are split between shards by invoice uuid, so every version of
+    one invoice is replayed by the same worker in archive order and the
+    newest version wins. Returns ``(processed, skipped, failed)``.
+    """
+    identities = IngestionIdentityMap().preload()
+    counts = {"skipped": 0}
+
+    def accepted():
+        for path in paths:
+            for payload in PayloadArchive.read(path):
+                uuid = str(payload.get("invoiceUniqueIdentifier", ""))
+                if shard_count > 1 and zlib.crc32(uuid.encode()) % shard_count != shard:
+                    continue
+
+                buyer = (payload.get("buyerDTO") or {}).get("buyerName")
+                if not buyer or not buyer.strip():
+                    counts["skipped"] += 1
+                else:
+                    yield payload
+
+    processed = failed = 0
+    for batch in iter_batches(accepted(), max(1, batch_size)):
+        for _, invoice, _ in process_invoice_batch(batch, identities=identities):
+            if invoice is None:
+                failed += 1
+            else:
+                processed += 1
+
+    return processed, counts["skipped"], failed
@@ -0,0 +1,135 @@
+"""Client-side throttling primitives for talking to the JOFotara API."""
+from __future__ import annotations
+
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: on average ``rate`` acquisitions per second,
+    with bursts of up to ``capacity``.
+
+    The rate adapts AIMD-style: ``penalize()`` halves it (down to
+    ``min_rate``) and ``reward()`` adds a small step back up to the
+    configured ceiling.
+    """
+
+    def __init__(self, rate, capacity=None, min_rate=0.5, step=0.1, clock=time.monotonic, sleep=time.sleep):
+        self.max_rate = float(rate)
+        self.rate = float(rate)
+        self.min_rate = min(float(min_rate), self.max_rate)
+        self.step = step
+        self.capacity = float(capacity or max(1.0, rate))
+        self.tokens = self.capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self._clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            self._sleep(wait)
+
+    def penalize(self):
+        with self._lock:
+            self._refill()
+            self.rate = max(self.min_rate, self.rate / 2)
+
+    def reward(self):
+        with self._lock:
+            self._refill()
+            self.rate = min(self.max_rate, self.rate + self.step)
+
+
+class AdaptiveConcurrency:
+    """
+    AIMD limit on the number of requests in flight.
+
+    Each healthy response grows the limit by ``1 / limit`` (roughly +1 per
+    round trip). An error, a throttling status or a response slower than
+    ``latency_target`` cuts it by ``decrease``. Cuts are applied at most
+    once per ``cooldown`` seconds, so one burst of failures only backs off
+    once.
+    """
+
+    def __init__(
+        self,
+        initial,
+        maximum=None,
+        minimum=1,
+        latency_target=None,
+        decrease=0.5,
+        cooldown=1.0,
+        clock=time.monotonic,
+    ):
+        self.maximum = maximum or initial
+        self.minimum = minimum
+        self.limit = float(min(initial, self.maximum))
+        self.latency_target = latency_target
+        self.decrease = decrease
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self._clock = clock
+        self._last_decrease = None
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+
+    def release(self, congested=False, latency=None):
+        with self._cond:
+            self.in_flight -= 1
+            slow = self.latency_target is not None and latency is not None and latency > self.latency_target
+            if congested or slow:
+                now = self._clock()
+                if self._last_decrease is None or now - self._last_decrease >= self.cooldown:
+                    self.limit = max(self.minimum, self.limit * self.decrease)
+                    self._last_decrease = now
+            else:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+RETRY_AFTER_MAX = 300.0
+
+
+def backoff_delay(attempt, base=0.5, cap=30.0, retry_after=None):
+    """Full-jitter exponential backoff, overridden by the server's Retry-After."""
+    if retry_after is not None:
+        return min(RETRY_AFTER_MAX, retry_after)
+    return random.uniform(0, min(cap, base * 2 ** attempt))
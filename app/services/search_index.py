@@ -0,0 +1,337 @@
+"""Full-text search over customers and invoices (SQLite FTS5 / PostgreSQL tsvector)."""
+from __future__ import annotations
+
+import logging
+import re
+import threading
+import uuid
+from functools import partial
+
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from app.models import Customer, Invoice, InvoiceLineItem
+
+logger = logging.getLogger(__name__)
+
+# Letters and digits only, so a term means the same thing to Python, the
+# FTS5 unicode61 tokenizer and the PostgreSQL parser.
+TOKEN = re.compile(r"[^\W_]+")
+CHUNK_SIZE = 500
+
+
+def search_tokens(term: str) -> list[str]:
+    return TOKEN.findall((term or "").casefold())
+
+
+class SearchBackend:
+    """
+    Substring matching, for databases without a search index.
+
+    The indexed backends fall back to these answers for terms with no
+    letters or digits in them, which an index cannot look up.
+    """
+
+    enabled = False
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def customer_filter(self, term: str) -> Q:
+        return Q(name__icontains=term) | Q(email__icontains=term) | Q(phone_number__icontains=term)
+
+    def invoice_filter(self, term: str) -> Q:
+        lines = InvoiceLineItem.objects.filter(description__icontains=term).values("invoice_id")
+        return Q(invoice_number__icontains=term) | Q(notes__icontains=term) | Q(pk__in=lines)
+
+    def search_customers(self, term: str, limit: int = 10) -> list[Customer]:
+        return list(Customer.objects.filter(self.customer_filter(term)).order_by("name")[:limit])
+
+    def index_customers(self, pks=None) -> None:
+        """Bring the documents of ``pks`` (or of every customer) up to date."""
+
+    def index_invoices(self, pks=None) -> None:
+        """Bring the documents of ``pks`` (or of every invoice) up to date."""
+
+    def rebuild(self) -> None:
+        """Drop and re-create every document."""
+
+
+class _IndexedBackend(SearchBackend):
+    """
+    Shared plumbing for the index-backed searches.
+
+    Documents live in ``app_customer_search`` / ``app_invoice_search``, one
+    row per customer or invoice. The statements below take a ``{keys}``
+    placeholder that restricts them to a chunk of primary keys.
+    """
+
+    enabled = True
+
+    CUSTOMER_UPSERT = CUSTOMER_DELETE = CUSTOMER_MATCH = ""
+    INVOICE_UPSERT = INVOICE_DELETE = INVOICE_MATCH = ""
+    CUSTOMER_RANK = ""
+
+    def query(self, tokens) -> str:
+        raise NotImplementedError
+
+    def _keys_in(self, chunk) -> tuple[str, list]:
+        return f"IN ({', '.join(['%s'] * len(chunk))})", list(chunk)
+
+    def _write(self, upsert, delete, keys) -> None:
+        with self.connection.cursor() as cursor:
+            if keys is None:
+                cursor.execute(upsert.format(keys="IS NOT NULL"))
+                return
+            keys = list(keys)
+            for start in range(0, len(keys), CHUNK_SIZE):
+                restriction, params = self._keys_in(keys[start:start + CHUNK_SIZE])
+                cursor.execute(upsert.format(keys=restriction), params)
+                cursor.execute(delete.format(keys=restriction), params)
+
+    def customer_filter(self, term):
+        tokens = search_tokens(term)
+        if not tokens:
+            return super().customer_filter(term)
+        return Q(pk__in=RawSQL(self.CUSTOMER_MATCH, [self.query(tokens)]))
+
+    def invoice_filter(self, term):
+        tokens = search_tokens(term)
+        if not tokens:
+            return super().invoice_filter(term)
+        return Q(pk__in=RawSQL(self.INVOICE_MATCH, [self.query(tokens)]))
+
+    def search_customers(self, term, limit=10):
+        """Best matches first, names weighted above email and phone."""
+        tokens = search_tokens(term)
+        if not tokens:
+            return super().search_customers(term, limit)
+
+        with self.connection.cursor() as cursor:
+            cursor.execute(self.CUSTOMER_RANK, [self.query(tokens), limit])
+            ids = [pk if isinstance(pk, uuid.UUID) else uuid.UUID(pk) for pk, in cursor.fetchall()]
+        found = Customer.objects.in_bulk(ids)
+        return [found[pk] for pk in ids if pk in found]
+
+    def index_customers(self, pks=None):
+        if pks is not None:
+            field = Customer._meta.pk
+            pks = [field.get_db_prep_value(field.to_python(pk), self.connection) for pk in pks]
+        self._write(self.CUSTOMER_UPSERT, self.CUSTOMER_DELETE, pks)
+
+    def index_invoices(self, pks=None):
+        self._write(self.INVOICE_UPSERT, self.INVOICE_DELETE, pks)
+
+
+class SQLiteSearchBackend(_IndexedBackend):
+    """
+    FTS5 external-content tables (``app_customer_fts`` / ``app_invoice_fts``)
+    over the document tables, kept in step with them by triggers.
+    """
+
+    CUSTOMER_UPSERT = """
+        INSERT INTO app_customer_search (customer_id, name, email, phone)
+        SELECT c.id, c.name, COALESCE(c.email, ''), COALESCE(c.phone_number, '')
+        FROM app_customer c WHERE c.id {keys}
+        ON CONFLICT (customer_id) DO UPDATE SET
+            name = excluded.name, email = excluded.email, phone = excluded.phone
+        WHERE name IS NOT excluded.name OR email IS NOT excluded.email OR phone IS NOT excluded.phone
+    """
+    CUSTOMER_DELETE = """
+        DELETE FROM app_customer_search WHERE customer_id {keys}
+        AND NOT EXISTS (SELECT 1 FROM app_customer c WHERE c.id = app_customer_search.customer_id)
+    """
+    CUSTOMER_MATCH = """
+        SELECT s.customer_id FROM app_customer_fts f JOIN app_customer_search s ON s.id = f.rowid
+        WHERE app_customer_fts MATCH %s
+    """
+    CUSTOMER_RANK = f"{CUSTOMER_MATCH} ORDER BY bm25(app_customer_fts, 10.0, 2.0, 2.0) LIMIT %s"
+    INVOICE_UPSERT = """
+        INSERT INTO app_invoice_search (invoice_id, invoice_number, notes, lines)
+        SELECT i.id, i.invoice_number, COALESCE(i.notes, ''), COALESCE(
+            (SELECT group_concat(l.description, ' ') FROM app_invoicelineitem l WHERE l.invoice_id = i.id), ''
+        )
+        FROM app_invoice i WHERE i.id {keys}
+        ON CONFLICT (invoice_id) DO UPDATE SET
+            invoice_number = excluded.invoice_number, notes = excluded.notes, lines = excluded.lines
+        WHERE invoice_number IS NOT excluded.invoice_number
+            OR notes IS NOT excluded.notes OR lines IS NOT excluded.lines
+    """
+    INVOICE_DELETE = """
+        DELETE FROM app_invoice_search WHERE invoice_id {keys}
+        AND NOT EXISTS (SELECT 1 FROM app_invoice i WHERE i.id = app_invoice_search.invoice_id)
+    """
+    INVOICE_MATCH = "SELECT rowid FROM app_invoice_fts WHERE app_invoice_fts MATCH %s"
+
+    def query(self, tokens):
+        # Implicit AND of quoted prefix terms; tokens never contain quotes.
+        return " ".join(f'"{token}"*' for token in tokens)
+
+    def rebuild(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute("DELETE FROM app_customer_search")
+            cursor.execute("DELETE FROM app_invoice_search")
+        self.index_customers()
+        self.index_invoices()
+        with self.connection.cursor() as cursor:
+            for table in ("app_customer_fts", "app_invoice_fts"):
+                cursor.execute(f"INSERT INTO {table} ({table}) VALUES ('rebuild')")
+                cursor.execute(f"INSERT INTO {table} ({table}) VALUES ('optimize')")
+
+
+# Punctuation becomes a word break, as in FTS5, so "jane@example.com" is
+# three lexemes rather than one email token.
+POSTGRES_DOCUMENT = "to_tsvector('simple', regexp_replace(concat_ws(' ', {columns}), '[^[:alnum:]]+', ' ', 'g'))"
+
+
+class PostgresSearchBackend(_IndexedBackend):
+    """``tsvector`` documents (``simple`` configuration) with GIN indexes."""
+
+    CUSTOMER_UPSERT = f"""
+        INSERT INTO app_customer_search (customer_id, document)
+        SELECT c.id, {POSTGRES_DOCUMENT.format(columns="c.name, c.email, c.phone_number")}
+        FROM app_customer c WHERE c.id {{keys}}
+        ON CONFLICT (customer_id) DO UPDATE SET document = EXCLUDED.document
+        WHERE app_customer_search.document IS DISTINCT FROM EXCLUDED.document
+    """
+    CUSTOMER_DELETE = """
+        DELETE FROM app_customer_search WHERE customer_id {keys}
+        AND NOT EXISTS (SELECT 1 FROM app_customer c WHERE c.id = app_customer_search.customer_id)
+    """
+    CUSTOMER_MATCH = "SELECT customer_id FROM app_customer_search WHERE document @@ to_tsquery('simple', %s)"
+    CUSTOMER_RANK = """
+        SELECT customer_id FROM app_customer_search, to_tsquery('simple', %s) query
+        WHERE document @@ query ORDER BY ts_rank(document, query) DESC LIMIT %s
+    """
+    INVOICE_UPSERT = f"""
+        INSERT INTO app_invoice_search (invoice_id, document)
+        SELECT i.id, {POSTGRES_DOCUMENT.format(columns='''i.invoice_number, i.notes,
+            (SELECT string_agg(l.description, ' ') FROM app_invoicelineitem l WHERE l.invoice_id = i.id)''')}
+        FROM app_invoice i WHERE i.id {{keys}}
+        ON CONFLICT (invoice_id) DO UPDATE SET document = EXCLUDED.document
+        WHERE app_invoice_search.document IS DISTINCT FROM EXCLUDED.document
+    """
+    INVOICE_DELETE = """
+        DELETE FROM app_invoice_search WHERE invoice_id {keys}
+        AND NOT EXISTS (SELECT 1 FROM app_invoice i WHERE i.id = app_invoice_search.invoice_id)
+    """
+    INVOICE_MATCH = "SELECT invoice_id FROM app_invoice_search WHERE document @@ to_tsquery('simple', %s)"
+
+    def query(self, tokens):
+        return " & ".join(f"{token}:*" for token in tokens)
+
+    def _keys_in(self, chunk):
+        return "= ANY(%s)", [list(chunk)]
+
+    def rebuild(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute("TRUNCATE app_customer_search, app_invoice_search")
+        self.index_customers()
+        self.index_invoices()
+
+
+# Whether each SQLite database's library was built with FTS5, keyed by alias
+# and file; it cannot change while the process runs.
+_fts5 = {}
+
+
+def _fts5_available(connection) -> bool:
+    key = (connection.alias, connection.settings_dict["NAME"])
+    if key not in _fts5:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+            _fts5[key] = bool(cursor.fetchone()[0])
+    return _fts5[key]
+
+
+def get_backend(connection=None) -> SearchBackend:
+    """The search backend for ``connection`` (the default database by default)."""
+    connection = connection or connections[DEFAULT_DB_ALIAS]
+    if connection.vendor == "postgresql":
+        return PostgresSearchBackend(connection)
+    if connection.vendor == "sqlite" and _fts5_available(connection):
+        return SQLiteSearchBackend(connection)
+    return SearchBackend(connection)
+
+
+def customer_filter(term: str) -> Q:
+    return get_backend().customer_filter(term)
+
+
+def invoice_filter(term: str) -> Q:
+    """Invoices whose number, notes or line descriptions match, or whose customer does."""
+    backend = get_backend()
+    customers = Customer.objects.filter(backend.customer_filter(term)).values("pk")
+    return backend.invoice_filter(term) | Q(customer__in=customers)
+
+
+def search_customers(term: str, limit: int = 10) -> list[Customer]:
+    return get_backend().search_customers(term, limit)
+
+
+# Primary keys saved or deleted in this thread, indexed once the
+# transaction that touched them commits.
+_pending = threading.local()
+
+
+def _pending_keys(using) -> dict:
+    if not hasattr(_pending, "keys"):
+        _pending.keys = {}
+    return _pending.keys.setdefault(using, {Customer: set(), Invoice: set()})
+
+
+def enqueue(model, pks, using=DEFAULT_DB_ALIAS) -> None:
+    """
+    Reindex ``pks`` of ``model`` (``Customer`` or ``Invoice``) after commit.
+
+    The signal handlers call this for ordinary saves and deletes; call it
+    directly after writes that send no signals, such as ``bulk_create``.
+    """
+    _pending_keys(using)[model].update(pks)
+    # Every call registers a flush: only the first to run after a commit
+    # finds work, and keys left behind by a rollback go out with the next.
+    transaction.on_commit(partial(flush, using), using=using)
+
+
+def flush(using=DEFAULT_DB_ALIAS) -> None:
+    pending = _pending_keys(using)
+    customers, invoices = pending[Customer], pending[Invoice]
+    if not customers and not invoices:
+        return
+    pending[Customer], pending[Invoice] = set(), set()
+
+    backend = get_backend(connections[using])
+    try:
+        # One commit for all the index writes instead of one per statement.
+        with transaction.atomic(using=using):
+            if customers:
+                backend.index_customers(customers)
+            if invoices:
+                backend.index_invoices(invoices)
+    except Exception as e:
+        # The index is derived data; a failure here must not fail the save
+        # that already committed. rebuild_search_index repairs it.
+        logger.exception("Could not update the search index: %s", e)
+
+
+@receiver(post_save, sender=Customer, dispatch_uid="search_index_customer_saved")
+@receiver(post_delete, sender=Customer, dispatch_uid="search_index_customer_deleted")
+def _customer_changed(sender, instance, using, **kwargs):
+    enqueue(Customer, [instance.pk], using=using)
+
+
+# Line items reach the index through their invoice: every line save ends in
+# Invoice.refresh_totals(), which saves the invoice. Deletes (including
+# queryset deletes) do not, so they re-index the invoice themselves.
+@receiver(post_save, sender=Invoice, dispatch_uid="search_index_invoice_saved")
+@receiver(post_delete, sender=Invoice, dispatch_uid="search_index_invoice_deleted")
+def _invoice_changed(sender, instance, using, **kwargs):
+    enqueue(Invoice, [instance.pk], using=using)
+
+
+@receiver(post_delete, sender=InvoiceLineItem, dispatch_uid="search_index_line_deleted")
+def _line_deleted(sender, instance, using, **kwargs):
+    enqueue(Invoice, [instance.invoice_id], using=using)
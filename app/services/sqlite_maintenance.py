@@ -0,0 +1,68 @@
+"""Periodic housekeeping for long-running processes on the SQLite database."""
+from __future__ import annotations
+
+import logging
+import threading
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+logger = logging.getLogger(__name__)
+
+
+def run_maintenance(using=DEFAULT_DB_ALIAS, checkpoint="PASSIVE"):
+    """
+    Refresh the query planner's statistics and fold the WAL back into the
+    database file. Returns the ``(busy, wal_pages, checkpointed_pages)`` row
+    of ``wal_checkpoint``.
+
+    ``PASSIVE`` never waits for readers or writers, so it is safe while the
+    app is in use; ``TRUNCATE`` also empties the WAL file and is meant for
+    shutdown.
+    """
+    with connections[using].cursor() as cursor:
+        cursor.execute("PRAGMA optimize")
+        cursor.execute(f"PRAGMA wal_checkpoint({checkpoint})")
+        return cursor.fetchone()
+
+
+class SQLiteMaintenance:
+    """
+    Background thread calling ``run_maintenance`` every ``interval`` seconds.
+
+    ``stop()`` wakes the thread and runs a final ``TRUNCATE`` checkpoint.
+    """
+
+    def __init__(self, interval=None, using=DEFAULT_DB_ALIAS):
+        self.interval = settings.SQLITE_MAINTENANCE_INTERVAL if interval is None else interval
+        self.using = using
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self) -> "SQLiteMaintenance":
+        if connections[self.using].vendor != "sqlite" or self.interval <= 0:
+            return self
+        self._thread = threading.Thread(target=self._run, name="sqlite-maintenance", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stopped.set()
+        self._thread.join()
+        self._thread = None
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            self._maintain("PASSIVE")
+        self._maintain("TRUNCATE")
+        connections[self.using].close()
+
+    def _maintain(self, checkpoint) -> None:
+        try:
+            busy, wal_pages, moved = run_maintenance(self.using, checkpoint)
+        except DatabaseError:
+            logger.exception("SQLite maintenance failed")
+            return
+        logger.info("SQLite maintenance: %s/%s WAL pages checkpointed%s", moved, wal_pages, " (busy)" if busy else "")
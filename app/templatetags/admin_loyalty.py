@@ -1,6 +1,5 @@
 from __future__ import annotations
 from django import template
-from django.db.models import Count
 from app.models import Customer
 
 register = template.Library()
@@ -13,8 +12,7 @@ def loyalty_leaders():
     for status in Customer.LoyaltyStatus:
         top_customers = (
             Customer.objects.filter(loyalty_status=status.value)
-            .annotate(invoice_total=Count("invoices"))
-            .order_by("-invoice_total", "name")[:3]
+            .order_by("-invoice_count", "name")[:3]
         )
         leaders.append({
             "status_label": status.label,
@@ -0,0 +1,26 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def isolated_token_cache(settings, tmp_path):
+    settings.JOFOTARA_TOKEN_CACHE = tmp_path / "jofotara_token.json"
+
+
+@pytest.fixture(autouse=True)
+def fresh_loyalty_settings_cache():
+    # Test transactions roll back, so a cached settings row may no longer exist.
+    from app.models.customer import LoyaltySettings
+
+    LoyaltySettings.clear_cache()
+    yield
+    LoyaltySettings.clear_cache()
+
+
+@pytest.fixture(autouse=True)
+def fresh_invoice_number_observations():
+    # Values observed in one test's database must not skip writes in the next.
+    from app.models import InvoiceNumberSequence
+
+    InvoiceNumberSequence._observed.clear()
+    yield
+    InvoiceNumberSequence._observed.clear()
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from app.models import Customer
+from app.services.customer_import import bulk_import_customers, read_customer_rows
+
+CSV = """name,email,phone_number,preferred_contact_method
+Alice,alice@example.com,0791111111,Email
+Bob,,0792222222,SMS
+Existing,taken@example.com,,None
+Carol,alice@example.com,,None
+Dave,not-an-email,,None
+Eve,,12345,None
+Frank,,,Phone
+,nobody@example.com,,None
+Bob,,0792222222,None
+"""
+
+
+@pytest.mark.django_db
+def test_bulk_import_validates_set_wise_and_reports_rejects(tmp_path):
+    Customer.objects.create(name="Someone", email="taken@example.com")
+    path = tmp_path / "customers.csv"
+    path.write_text(CSV, encoding="utf-8")
+
+    with CaptureQueriesContext(connection) as ctx:
+        result = bulk_import_customers(read_customer_rows(path), batch_size=100)
+
+    assert result.created == 2
+    assert sorted(number for number, _ in result.rejected) == [4, 5, 6, 7, 8, 9, 10]
+    assert set(Customer.objects.values_list("name", flat=True)) == {"Someone", "Alice", "Bob"}
+    lookups = [q for q in ctx.captured_queries if q["sql"].startswith("SELECT") and 'FROM "app_customer"' in q["sql"]]
+    assert len(lookups) == 1
+
+
+@pytest.mark.django_db
+def test_bulk_import_reads_jsonl(tmp_path):
+    path = tmp_path / "customers.jsonl"
+    path.write_text('{"name": "Jay", "phone": "0790000000"}\n\n{"name": "Kay"}\n', encoding="utf-8")
+
+    result = bulk_import_customers(read_customer_rows(path))
+
+    assert (result.created, result.rejected) == (2, [])
+    assert Customer.objects.get(name="Jay").phone_number == "0790000000"
+
+
+@pytest.mark.django_db
+def test_bulk_import_rejects_jsonl_lines_that_are_not_objects(tmp_path):
+    path = tmp_path / "customers.jsonl"
+    path.write_text('["Jay"]\n"Kay"\n42\n{"name": "May"}\n', encoding="utf-8")
+
+    result = bulk_import_customers(read_customer_rows(path))
+
+    assert result.created == 1
+    assert [number for number, _ in result.rejected] == [1, 2, 3]
+    assert result.rejected[0][1] == "Expected an object of customer fields, got list."
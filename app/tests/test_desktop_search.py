@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import pytest
+
+from app.models import Customer
+from desktop_app.services.search_service import CustomerPrefixIndex, index_keys
+
+
+def test_index_keys_cover_each_name_word_phone_and_email():
+    assert index_keys("  Jane  DOE ", "0791234567", "Jane@Example.com") == {
+        "jane doe",
+        "doe",
+        "0791234567",
+        "jane@example.com",
+    }
+
+
+@pytest.mark.django_db(transaction=True)
+def test_prefix_index_loads_in_background_and_follows_commits():
+    jane = Customer.objects.create(name="Jane Doe", phone_number="0791234567")
+    Customer.objects.create(name="John Smith", email="john@sample.org")
+
+    index = CustomerPrefixIndex()
+    index.start()
+    assert index.wait(timeout=10)
+
+    assert [c.id for c in index.search("JA")] == [jane.pk]
+    assert [c.name for c in index.search("doe")] == ["Jane Doe"]
+    assert [c.name for c in index.search("john@")] == ["John Smith"]
+    assert len(index.search("j")) == 2
+    assert len(index.search("j", limit=1)) == 1
+
+    jane.name = "Janet Roe"
+    jane.save()
+    assert index.search("doe") == []
+    assert [c.name for c in index.search("079")] == ["Janet Roe"]
+
+    jane.delete()
+    assert index.search("roe") == []
+    assert index.search("079") == []
+
+
+@pytest.mark.django_db(transaction=True)
+def test_prefix_index_reloads_customers_written_without_signals():
+    Customer.objects.create(name="Jane Doe")
+    index = CustomerPrefixIndex()
+    index.start()
+    assert index.wait(timeout=10)
+    assert not index.reload_if_changed()
+
+    Customer.objects.bulk_create([Customer(name="Bulk Buyer")])
+    assert index.search("bulk") == []
+
+    assert index.reload_if_changed()
+    index._thread.join(timeout=10)
+    assert [c.name for c in index.search("bulk")] == ["Bulk Buyer"]
+    assert not index.reload_if_changed()
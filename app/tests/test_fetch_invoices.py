@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from datetime import date
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from app.models import BackfillShard, Customer, Invoice, SyncState
+from app.services.jofotara_standin import JofotaraStandin, StandinConfig, StandinData
+
+
+@pytest.fixture
+def standin():
+    with JofotaraStandin(StandinConfig(invoices=12, page_size=5, customers=3)) as server:
+        yield server
+
+
+def fetch(standin, *args):
+    out = StringIO()
+    call_command("fetch_invoices", *args, base_url=standin.url, no_archive=True, stdout=out, stderr=out)
+    return out.getvalue()
+
+
+@pytest.mark.django_db
+def test_fetch_invoices_against_standin(standin):
+    output = fetch(standin, "--workers=4", "--batch-size=5")
+
+    assert Invoice.objects.count() == 12
+    assert "in 3 batches" in output
+    assert Customer.objects.count() == 3
+    state = SyncState.objects.get(key=SyncState.JOFOTARA_INVOICES)
+    assert state.last_uuid == standin.data.summary(11)["invoiceUniqueIdentifier"]
+
+
+@pytest.mark.django_db
+def test_incremental_fetch_only_downloads_new_invoices(standin):
+    fetch(standin)
+    standin.data = StandinData(StandinConfig(invoices=15, page_size=5, customers=3))
+
+    output = fetch(standin)
+
+    assert Invoice.objects.count() == 15
+    assert "15 invoices found" not in output
+    assert "✔ 3 written" in output
+
+
+@pytest.mark.django_db
+def test_sharded_backfill_resumes_from_checkpoint():
+    config = StandinConfig(invoices=90, page_size=10, customers=3, invoices_per_day=1)
+    with JofotaraStandin(config) as server:
+        output = fetch(server, "--shard-by=month", "--since=2024-01-01", "--until=2024-02-29", "--processes=1")
+
+        assert "2024-01-01..2024-01-31: 31 written" in output
+        assert "2024-02-01..2024-02-29: 29 written" in output
+        assert Invoice.objects.count() == 60
+        assert set(BackfillShard.objects.values_list("status", flat=True)) == {BackfillShard.DONE}
+
+        # An interrupted shard picks up after its last committed page.
+        BackfillShard.objects.create(
+            date_from=date(2024, 3, 1), date_to=date(2024, 3, 31), status=BackfillShard.RUNNING, last_page=2
+        )
+        output = fetch(server, "--shard-by=month", "--since=2024-01-01", "--until=2024-03-31", "--processes=1")
+
+    assert "2024-03-01..2024-03-31: 10 written" in output
+    assert "2024-01-31:" not in output
+    assert Invoice.objects.count() == 70
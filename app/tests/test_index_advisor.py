@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.db import connection
+
+from app.models import Customer
+from app.services.index_advisor import advise, full_scans
+
+
+def test_full_scan_detection():
+    assert full_scans("2 0 0 SCAN app_customer", "sqlite") == ["app_customer"]
+    assert full_scans("3 0 0 SCAN app_invoice USING INDEX invoice_issue_date_idx", "sqlite") == []
+    assert full_scans("Seq Scan on app_invoice  (cost=0.00..1.01 rows=1)", "postgresql") == ["app_invoice"]
+
+
+@pytest.mark.django_db
+def test_known_queries_are_index_backed():
+    flagged = {label: scanned for label, _, scanned in advise() if scanned}
+    assert flagged == {}
+
+
+@pytest.mark.django_db
+def test_advisor_flags_unindexed_query():
+    [(_, _, scanned)] = advise([("contains search", Customer.objects.filter(address__icontains="x"))])
+    assert scanned == ["app_customer"]
+
+
+def test_advisor_command_names_supported_databases(monkeypatch):
+    monkeypatch.setattr(connection, "vendor", "oracle")
+    with pytest.raises(CommandError, match="sqlite, postgresql"):
+        call_command("index_advisor")
@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+import uuid
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from app.models import Customer, FailedInvoicePayload, Invoice, InvoiceLineItem, InvoiceNumberSequence, QrCode
+from app.services.invoice_logic import (
+    IngestionIdentityMap,
+    process_invoice_batch,
+    process_invoice_payload,
+    redrive_failed_payloads,
+)
+from app.services.payload_archive import PayloadArchive, replay_shard
+
+
+def make_payload(number="INV-1", lines=None, **overrides):
+    if lines is None:
+        lines = [
+            {"productDescription": "Widget", "quantity": 2, "unitPrice": 1.25, "discountAmount": 0.5},
+            {"productDescription": "Gadget", "quantity": 3, "unitPrice": 10.5, "discountAmount": 0},
+        ]
+    payload = {
+        "invoiceUniqueIdentifier": str(uuid.uuid5(uuid.NAMESPACE_URL, number)),
+        "invoiceNumber": number,
+        "issueDate": "15-01-2025",
+        "currencyEnum": "JOD",
+        "totalPayableAmount": 0,
+        "invoiceStatus": "UNPAID",
+        "sellerDTO": {"taxNumber": "123456", "name": "GCI", "mobileNumber": "0790000000"},
+        "buyerDTO": {"buyerName": "  jane   doe "},
+        "invoiceItemDTOList": lines,
+    }
+    payload.update(overrides)
+    return payload
+
+
+@pytest.mark.django_db
+def test_bulk_line_ingestion_matches_per_line_totals():
+    payload = make_payload()
+    invoice = process_invoice_payload(payload)
+
+    reference = Invoice.objects.create(
+        invoice_number="REF-1",
+        customer=Customer.objects.create(name="Reference"),
+        issue_date=date(2025, 1, 15),
+        status="UNPAID",
+    )
+    for line in payload["invoiceItemDTOList"]:
+        InvoiceLineItem.objects.create(
+            invoice=reference,
+            description=line["productDescription"],
+            quantity=line["quantity"],
+            unit_price=line["unitPrice"],
+            discount_amount=line["discountAmount"],
+        )
+
+    invoice.refresh_from_db()
+    reference.refresh_from_db()
+    assert invoice.line_items.count() == 2
+    assert (invoice.subtotal, invoice.discount_total, invoice.total_due) == (
+        reference.subtotal,
+        reference.discount_total,
+        reference.total_due,
+    )
+    assert invoice.total_due == Decimal("33.500")
+
+
+@pytest.mark.django_db
+def test_line_ingestion_query_count_does_not_grow_with_lines():
+    line = {"productDescription": "Item", "quantity": 1, "unitPrice": 1, "discountAmount": 0}
+    process_invoice_payload(make_payload("WARM-UP"))
+
+    with CaptureQueriesContext(connection) as few:
+        process_invoice_payload(make_payload("FEW", lines=[line] * 2))
+    with CaptureQueriesContext(connection) as many:
+        process_invoice_payload(make_payload("MANY", lines=[line] * 40))
+
+    assert len(many) == len(few)
+
+
+@pytest.mark.django_db
+def test_identity_map_serves_known_seller_and_customer_without_queries():
+    process_invoice_payload(make_payload("FIRST"))
+    identities = IngestionIdentityMap().preload()
+
+    with CaptureQueriesContext(connection) as ctx:
+        invoice = process_invoice_payload(make_payload("SECOND"), identities=identities)
+
+    assert invoice.customer.name == "Jane Doe"
+    lookups = [
+        q["sql"] for q in ctx.captured_queries
+        if q["sql"].startswith("SELECT") and ('FROM "app_seller"' in q["sql"] or 'FROM "app_customer"' in q["sql"])
+    ]
+    assert lookups == []
+
+
+@pytest.mark.django_db
+def test_failed_batch_falls_back_to_per_invoice_savepoints():
+    payloads = [make_payload("B-1"), make_payload("B-2", issueDate="not a date"), make_payload("B-3")]
+
+    results = process_invoice_batch(payloads)
+
+    assert [invoice is not None for _, invoice, _ in results] == [True, False, True]
+    assert isinstance(results[1][2], ValueError)
+    assert set(Invoice.objects.values_list("invoice_number", flat=True)) == {"B-1", "B-3"}
+    assert Customer.objects.count() == 1
+    assert list(FailedInvoicePayload.objects.values_list("invoice_number", flat=True)) == ["B-2"]
+
+
+@pytest.mark.django_db
+def test_batch_moves_invoice_number_sequence_once(django_capture_on_commit_callbacks):
+    InvoiceNumberSequence.for_name()
+    payloads = [make_payload(f"EIN{n:05d}") for n in (7, 9, 8)]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        with CaptureQueriesContext(connection) as ctx:
+            process_invoice_batch(payloads)
+
+    sequence_writes = [q["sql"] for q in ctx.captured_queries if q["sql"].startswith('UPDATE "app_invoicenumbersequence"')]
+    assert len(sequence_writes) == 1
+    assert InvoiceNumberSequence.peek() == "EIN00010"
+
+    # Numbers at or below what this process already observed cost no query.
+    with CaptureQueriesContext(connection) as ctx:
+        InvoiceNumberSequence.observe("EIN00008")
+    assert ctx.captured_queries == []
+
+
+@pytest.mark.django_db
+def test_failed_payloads_are_dead_lettered_and_redriven():
+    broken = make_payload("DL-1", issueDate="not a date")
+    assert process_invoice_payload(broken) is None
+    assert process_invoice_payload(broken) is None
+
+    entry = FailedInvoicePayload.objects.get()
+    assert entry.attempts == 2
+    assert entry.error.startswith("ValueError")
+
+    assert redrive_failed_payloads() == (0, 1)
+    assert FailedInvoicePayload.objects.get().attempts == 3
+
+    # A transient failure: the stored payload is fine on the next attempt.
+    FailedInvoicePayload.objects.update(payload=make_payload("DL-1"))
+    assert redrive_failed_payloads() == (1, 0)
+    assert not FailedInvoicePayload.objects.exists()
+    assert Invoice.objects.filter(invoice_number="DL-1").exists()
+
+
+@pytest.mark.django_db
+def test_dead_letter_keys_match_however_the_uuid_is_written():
+    for number in ("NO-UUID-1", "NO-UUID-2"):
+        payload = make_payload(number)
+        del payload["invoiceUniqueIdentifier"]
+        process_invoice_payload(payload)
+    assert FailedInvoicePayload.objects.filter(uuid="").count() == 0
+    assert FailedInvoicePayload.objects.count() == 2
+
+    broken = make_payload("DL-2", issueDate="not a date")
+    broken["invoiceUniqueIdentifier"] = broken["invoiceUniqueIdentifier"].upper()
+    process_invoice_payload(broken)
+    assert FailedInvoicePayload.objects.filter(invoice_number="DL-2").exists()
+
+    process_invoice_payload(make_payload("DL-2"))
+    assert not FailedInvoicePayload.objects.filter(invoice_number="DL-2").exists()
+
+
+@pytest.mark.django_db
+def test_unchanged_payload_is_skipped_without_writes():
+    payload = make_payload("SAME")
+    first = process_invoice_payload(payload)
+    line_ids = set(first.line_items.values_list("id", flat=True))
+
+    with CaptureQueriesContext(connection) as ctx:
+        second = process_invoice_payload(dict(reversed(list(payload.items()))))
+
+    assert second.pk == first.pk
+    writes = [q["sql"] for q in ctx.captured_queries if q["sql"].split()[0] in {"INSERT", "UPDATE", "DELETE"}]
+    assert writes == []
+    assert set(second.line_items.values_list("id", flat=True)) == line_ids
+
+    changed = process_invoice_payload(make_payload("SAME", invoiceStatus="DECLINED"))
+    assert changed.status == "DECLINED"
+
+
+@pytest.mark.django_db
+def test_qr_code_is_stored_once_and_decoded_on_demand(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    png = "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNk+M9QDwADhgGAWjR9awAAAABJRU5ErkJggg=="
+
+    first = process_invoice_payload(make_payload("QR-1", qrCodeImage=png))
+    second = process_invoice_payload(make_payload("QR-2", qrCodeImage=f"data:image/png;base64,{png}"))
+
+    assert first.qr_code_id == second.qr_code_id
+    assert QrCode.objects.count() == 1
+    assert not list(tmp_path.rglob("*.png"))
+
+    image = first.qr_code.ensure_image()
+    assert image.name.endswith(f"{first.qr_code.digest}.png")
+    assert len(list(tmp_path.rglob("*.png"))) == 1
+
+    garbled = process_invoice_payload(make_payload("QR-3", qrCodeImage="رمز غير صالح"))
+    assert garbled.qr_code.data == "رمز غير صالح"
+
+
+@pytest.mark.django_db
+def test_archived_payloads_replay_without_network(tmp_path):
+    with PayloadArchive(tmp_path) as archive:
+        archive.append(make_payload("ARCH-1"), day=date(2025, 1, 1))
+        archive.append(make_payload("ARCH-2"), day=date(2025, 1, 2))
+    with PayloadArchive(tmp_path) as archive:
+        archive.append(make_payload("ARCH-1", invoiceStatus="DECLINED"), day=date(2025, 1, 2))
+
+    paths = PayloadArchive(tmp_path).partitions()
+    assert [p.name for p in paths] == ["2025-01-01.ndjson.gz", "2025-01-02.ndjson.gz"]
+
+    assert replay_shard(paths) == (3, 0, 0)
+    assert Invoice.objects.get(invoice_number="ARCH-1").status == "DECLINED"
+    assert Invoice.objects.filter(invoice_number="ARCH-2").exists()
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import threading
+import time
+import uuid as uuid_lib
+from datetime import date
+
+import pytest
+
+from app.models import Customer, Invoice
+from app.services.invoice_sync import SyncStats, SyncWatermark, iter_invoice_details, skip_ingested
+from app.services.jofoatara_api import JofoataraClient
+
+
+class FakeClient:
+    def __init__(self, fail_on=()):
+        self.fail_on = set(fail_on)
+        self.in_flight = 0
+        self.max_seen = 0
+        self.lock = threading.Lock()
+
+    def fetch_invoice(self, uuid, number):
+        with self.lock:
+            self.in_flight += 1
+            self.max_seen = max(self.max_seen, self.in_flight)
+        try:
+            time.sleep(0.01)
+            if number in self.fail_on:
+                raise RuntimeError("boom")
+            return {"invoiceUniqueIdentifier": uuid, "invoiceNumber": number}
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+def _summaries(count):
+    return [
+        {"invoiceUniqueIdentifier": f"uuid-{i}", "invoiceNumber": f"INV{i}"}
+        for i in range(count)
+    ]
+
+
+def test_sequential_details_preserve_order():
+    client = FakeClient()
+    results = list(iter_invoice_details(client, _summaries(3)))
+    assert [payload["invoiceNumber"] for _, payload, _ in results] == ["INV0", "INV1", "INV2"]
+    assert client.max_seen == 1
+
+
+def test_concurrent_details_cap_in_flight_requests():
+    client = FakeClient(fail_on={"INV3"})
+    results = list(
+        iter_invoice_details(client, iter(_summaries(20)), workers=4, max_in_flight=4)
+    )
+
+    assert len(results) == 20
+    assert client.max_seen <= 4
+    failed = [summary["invoiceNumber"] for summary, _, error in results if error]
+    assert failed == ["INV3"]
+
+
+class PagedClient(JofoataraClient):
+    def __init__(self, pages):
+        self.pages = pages
+        self.requested = []
+
+    def fetch_invoice_list(self, page=1, date_from=None, date_to=None):
+        self.requested.append(page)
+        return {"invoiceList": self.pages[page - 1] if page <= len(self.pages) else []}
+
+
+def _page(*numbers, day="10"):
+    return [
+        {
+            "invoiceUniqueIdentifier": str(uuid_lib.UUID(int=n)),
+            "invoiceNumber": f"INV{n}",
+            "issueDate": f"{day}-01-2025",
+        }
+        for n in numbers
+    ]
+
+
+def test_detail_latency_leaves_out_client_side_waits():
+    client = FakeClient()
+    client.last_latency = 0.002
+    stats = SyncStats()
+
+    list(iter_invoice_details(client, _summaries(2), stats=stats))
+
+    assert stats.detail_latencies == [0.002, 0.002]
+
+
+@pytest.mark.django_db
+def test_watermark_stops_paging_at_previously_ingested_invoice():
+    client = PagedClient([_page(5, 4), _page(3, 2), _page(1)])
+
+    first = SyncWatermark()
+    assert len(client.fetch_all_invoices(stop_at=first.reached)) == 5
+    first.save()
+
+    client.pages = [_page(7, 6, day="11"), _page(5, 4), _page(3, 2), _page(1)]
+    client.requested = []
+    second = SyncWatermark()
+    summaries = client.fetch_all_invoices(stop_at=second.reached)
+
+    assert [s["invoiceNumber"] for s in summaries] == ["INV7", "INV6"]
+    assert client.requested == [1, 2]
+
+
+@pytest.mark.django_db
+def test_skip_ingested_drops_stored_unchanged_invoices():
+    customer = Customer.objects.create(name="Stored Customer")
+    stored = Invoice.objects.create(
+        invoice_number="INV-STORED",
+        customer=customer,
+        issue_date=date(2025, 1, 1),
+        status="UNPAID",
+    )
+    summaries = [
+        {"invoiceUniqueIdentifier": str(stored.uuid), "invoiceStatus": "UNPAID"},
+        {"invoiceUniqueIdentifier": str(uuid_lib.uuid4())},
+    ]
+
+    assert list(skip_ingested([summaries])) == summaries[1:]
+
+    summaries[0]["invoiceStatus"] = "DECLINED"
+    assert list(skip_ingested([summaries])) == summaries
+
+
+def test_iter_invoice_pages_is_lazy():
+    client = PagedClient([_page(3, 2), _page(1)])
+    pages = client.iter_invoice_pages()
+
+    assert next(pages)[0] == 1
+    assert client.requested == [1]
+    assert [n for n, _ in pages] == [2]
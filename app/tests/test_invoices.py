@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from app.models import Customer, Invoice, InvoiceLineItem, InvoiceNumberSequence
+from app.models.customer import LoyaltySettings
+
+
+def _aggregates(ctx):
+    return [q["sql"] for q in ctx.captured_queries if "SUM(" in q["sql"]]
+
+
+@pytest.mark.django_db
+def test_deferred_totals_recalculates_once_on_exit():
+    invoice = Invoice.objects.create(
+        invoice_number="DEF-1",
+        customer=Customer.objects.create(name="Deferred"),
+        issue_date=date(2025, 1, 1),
+        status="UNPAID",
+    )
+
+    with CaptureQueriesContext(connection) as ctx:
+        with Invoice.deferred_totals(invoice):
+            for _ in range(10):
+                InvoiceLineItem.objects.create(invoice=invoice, quantity=2, unit_price=Decimal("1.5"))
+            assert Invoice.objects.get(pk=invoice.pk).total_due == 0
+
+    assert len(_aggregates(ctx)) == 1
+    invoice.refresh_from_db()
+    assert invoice.total_due == Decimal("30.000")
+
+    with CaptureQueriesContext(connection) as ctx:
+        InvoiceLineItem.objects.create(invoice=invoice, quantity=1, unit_price=Decimal("1"))
+    assert len(_aggregates(ctx)) == 1
+    invoice.refresh_from_db()
+    assert invoice.total_due == Decimal("31.000")
+
+
+@pytest.mark.django_db
+def test_deferred_totals_skips_recalculation_when_block_fails():
+    invoice = Invoice.objects.create(
+        invoice_number="DEF-2",
+        customer=Customer.objects.create(name="Deferred"),
+        issue_date=date(2025, 1, 1),
+        status="UNPAID",
+    )
+
+    with pytest.raises(RuntimeError), CaptureQueriesContext(connection) as ctx:
+        with Invoice.deferred_totals(invoice):
+            InvoiceLineItem.objects.create(invoice=invoice, quantity=1, unit_price=Decimal("1"))
+            raise RuntimeError
+
+    assert _aggregates(ctx) == []
+
+
+@pytest.mark.django_db
+def test_customer_invoice_count_follows_creates_moves_and_deletes():
+    alice = Customer.objects.create(name="Alice")
+    bob = Customer.objects.create(name="Bob")
+    invoices = [
+        Invoice.objects.create(invoice_number=f"CNT-{i}", customer=alice, issue_date=date(2025, 1, 1))
+        for i in range(3)
+    ]
+
+    moved = Invoice.objects.get(pk=invoices[0].pk)
+    moved.customer = bob
+    moved.save()
+    invoices[1].delete()
+    alice.name = "Alice Renamed"
+    alice.save()  # a stale in-memory counter must not be written back
+
+    alice.refresh_from_db()
+    bob.refresh_from_db()
+    assert (alice.invoice_count, bob.invoice_count) == (1, 1)
+
+    Invoice.objects.filter(customer=bob).delete()
+    bob.refresh_from_db()
+    assert bob.invoice_count == 0
+
+
+@pytest.mark.django_db
+def test_repair_invoice_counts_fixes_drift():
+    customer = Customer.objects.create(name="Drifted")
+    Invoice.objects.create(invoice_number="DRIFT-1", customer=customer, issue_date=date(2025, 1, 1))
+    Customer.objects.filter(pk=customer.pk).update(invoice_count=7)
+
+    assert [c.pk for c in Customer.repair_invoice_counts()] == [customer.pk]
+    customer.refresh_from_db()
+    assert customer.invoice_count == 1
+    assert not Customer.invoice_count_drift().exists()
+
+
+@pytest.mark.django_db
+def test_deleting_invoice_of_drifted_zero_counter_succeeds():
+    customer = Customer.objects.create(name="Drifted Low")
+    invoice = Invoice.objects.create(invoice_number="DRIFT-2", customer=customer, issue_date=date(2025, 1, 1))
+    Customer.objects.filter(pk=customer.pk).update(invoice_count=0)
+
+    invoice.delete()
+
+    customer.refresh_from_db()
+    assert customer.invoice_count == 0
+
+
+@pytest.mark.django_db
+def test_loyalty_tier_follows_stored_invoice_count():
+    LoyaltySettings.objects.create(silver_threshold=2, gold_threshold=3, platinum_threshold=4)
+    customer = Customer.objects.create(name="Loyal")
+
+    for i in range(3):
+        Invoice.objects.create(invoice_number=f"LOY-{i}", customer=customer, issue_date=date(2025, 1, 1))
+
+    customer.refresh_from_db()
+    assert (customer.invoice_count, customer.loyalty_status) == (3, Customer.LoyaltyStatus.GOLD)
+
+
+@pytest.mark.django_db
+def test_loyalty_settings_change_recomputes_every_unlocked_customer(django_capture_on_commit_callbacks):
+    settings = LoyaltySettings.objects.create(silver_threshold=50, gold_threshold=250, platinum_threshold=500)
+    for i in range(5):
+        Customer.objects.create(name=f"Tiered {i}")
+    locked = Customer.objects.create(name="Locked", loyalty_status_locked=True)
+    Customer.objects.update(invoice_count=3)
+
+    assert Customer.recompute_loyalty(chunk_size=2) == 0
+
+    settings.silver_threshold, settings.gold_threshold, settings.platinum_threshold = 1, 3, 10
+    with django_capture_on_commit_callbacks(execute=True):
+        settings.save()
+
+    assert set(Customer.objects.exclude(pk=locked.pk).values_list("loyalty_status", flat=True)) == {"Gold"}
+    locked.refresh_from_db()
+    assert locked.loyalty_status == Customer.LoyaltyStatus.NONE
+    assert Customer.recompute_loyalty(settings=settings, chunk_size=2) == 0
+
+
+@pytest.mark.django_db
+def test_loyalty_settings_are_cached_until_saved(django_assert_num_queries):
+    settings = LoyaltySettings.get_solo()
+
+    with django_assert_num_queries(0):
+        assert LoyaltySettings.get_solo() == settings
+
+    settings.silver_threshold = 5
+    settings.save()
+    assert LoyaltySettings.get_solo().silver_threshold == 5
+
+
+@pytest.mark.django_db
+def test_loyalty_settings_saved_by_another_process_are_picked_up(monkeypatch):
+    customer = Customer.objects.create(name="Elsewhere")
+    Customer.objects.filter(pk=customer.pk).update(invoice_count=3)
+    assert LoyaltySettings.get_solo().silver_threshold == 50
+
+    # Another process saves new thresholds: nothing here is told about it.
+    LoyaltySettings.objects.update(silver_threshold=2, updated_at=timezone.now())
+
+    # Tier writes read the committed thresholds, whatever this process cached.
+    customer.refresh_from_db()
+    assert customer.update_loyalty_status_from_invoices()
+    assert customer.loyalty_status == Customer.LoyaltyStatus.SILVER
+
+    monkeypatch.setattr(LoyaltySettings, "CACHE_TTL", 0)
+    assert LoyaltySettings.get_solo().silver_threshold == 2
+
+
+@pytest.mark.django_db
+def test_invoice_number_sequence_seeds_once_and_reserves_blocks():
+    customer = Customer.objects.create(name="Numbered")
+    Invoice.objects.create(invoice_number="EIN00041", customer=customer, issue_date=date(2025, 1, 1))
+
+    assert InvoiceNumberSequence.peek() == "EIN00042"
+    assert InvoiceNumberSequence.reserve_block(3) == ["EIN00042", "EIN00043", "EIN00044"]
+
+    with CaptureQueriesContext(connection) as ctx:
+        assert Invoice.generate_next_invoice_number() == "EIN00045"
+    assert not [q for q in ctx.captured_queries if 'FROM "app_invoice"' in q["sql"]]
+
+    Invoice.objects.create(invoice_number="EIN00100", customer=customer, issue_date=date(2025, 1, 1))
+    auto = Invoice.objects.create(customer=customer, issue_date=date(2025, 1, 1))
+    assert auto.invoice_number == "EIN00101"
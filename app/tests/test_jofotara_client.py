@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+from app.services.jofoatara_api import JofoataraClient
+from app.services.jofotara_standin import JofotaraStandin, StandinConfig
+from app.services.rate_limit import AdaptiveConcurrency, TokenBucket, backoff_delay, parse_retry_after
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def test_token_bucket_spaces_out_requests_after_burst():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=2, capacity=2, clock=clock, sleep=clock.sleep)
+
+    for _ in range(4):
+        bucket.acquire()
+
+    assert clock.now == 1.0
+
+
+def test_token_bucket_rate_backs_off_and_recovers():
+    bucket = TokenBucket(rate=8, step=1)
+    bucket.penalize()
+    bucket.penalize()
+    assert bucket.rate == 2
+    for _ in range(10):
+        bucket.reward()
+    assert bucket.rate == 8
+
+
+def test_adaptive_concurrency_is_aimd():
+    clock = FakeClock()
+    limiter = AdaptiveConcurrency(initial=8, latency_target=1.0, cooldown=5, clock=clock)
+
+    limiter.acquire()
+    limiter.release(congested=True)
+    limiter.acquire()
+    limiter.release(congested=True)  # same burst: only one cut
+    assert limiter.limit == 4
+
+    limiter.acquire()
+    limiter.release(latency=0.1)
+    assert limiter.limit == 4.25
+
+    clock.now = 10
+    limiter.acquire()
+    limiter.release(latency=3.0)  # too slow counts as congestion
+    assert limiter.limit == 2.125
+
+
+def test_retry_after_parsing_and_backoff():
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert parse_retry_after("soon") is None
+    assert backoff_delay(5, retry_after=2.0) == 2.0
+    assert 0 <= backoff_delay(3, base=1, cap=4) <= 4
+
+
+def test_client_only_caps_request_rate_when_configured(monkeypatch):
+    monkeypatch.delenv("JOFOTARA_RATE_LIMIT", raising=False)
+    assert JofoataraClient().rate_limiter is None
+
+    monkeypatch.setenv("JOFOTARA_RATE_LIMIT", "20")
+    assert JofoataraClient().rate_limiter.rate == 20
+
+
+def test_client_retries_throttled_responses():
+    with JofotaraStandin(StandinConfig(invoices=30, page_size=10, error_rate=0.3)) as standin:
+        client = JofoataraClient(base_url=standin.url, max_retries=20)
+        client.login()
+
+        summaries = client.fetch_all_invoices()
+        details = [client.fetch_invoice(s["invoiceUniqueIdentifier"], s["invoiceNumber"]) for s in summaries]
+
+    assert len(summaries) == 30
+    assert all(detail["invoiceItemDTOList"] for detail in details)
+
+
+def test_cached_token_is_reused_and_refreshed_on_401():
+    with JofotaraStandin(StandinConfig(invoices=10, page_size=5)) as standin:
+        JofoataraClient(base_url=standin.url).ensure_login()
+        client = JofoataraClient(base_url=standin.url)
+        client.ensure_login()
+        assert standin.logins == 1
+
+        standin.rotate_token()
+        assert len(client.fetch_all_invoices()) == 10
+        assert standin.logins == 2
+
+        JofoataraClient(base_url=standin.url).ensure_login()
+        assert standin.logins == 2
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+from datetime import date
+
+import pytest
+
+from app.models import Customer, Invoice, InvoiceLineItem
+from app.services import search_index
+
+@pytest.mark.django_db
+def test_customer_search_matches_word_prefixes_after_commit(django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        jane = Customer.objects.create(name="Jane Doe", email="jane@example.com", phone_number="0791234567")
+        Customer.objects.create(name="John Smith", email="john@sample.org")
+
+    assert search_index.search_customers("do ja") == [jane]
+    assert search_index.search_customers("079") == [jane]
+    assert set(Customer.objects.filter(search_index.customer_filter("example"))) == {jane}
+    # No letters or digits: answered by substring match instead of the index.
+    assert list(Customer.objects.filter(search_index.customer_filter("@sample."))) == [
+        Customer.objects.get(name="John Smith")
+    ]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        jane.name = "Janet Roe"
+        jane.save()
+    assert search_index.search_customers("doe") == []
+    assert search_index.search_customers("roe") == [jane]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        jane.delete()
+    assert search_index.search_customers("roe") == []
+
+
+@pytest.mark.django_db
+def test_invoice_search_covers_lines_and_customer(django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        customer = Customer.objects.create(name="Acme Trading")
+        invoice = Invoice.objects.create(
+            invoice_number="EIN00042", customer=customer, issue_date=date(2025, 1, 1), status="UNPAID"
+        )
+        InvoiceLineItem.objects.create(invoice=invoice, description="Blue widget", quantity=1, unit_price=5)
+        other = Invoice.objects.create(
+            invoice_number="EIN00043",
+            customer=Customer.objects.create(name="Other"),
+            issue_date=date(2025, 1, 1),
+            status="UNPAID",
+            notes="Deliver to warehouse",
+        )
+
+    def found(term):
+        return set(Invoice.objects.filter(search_index.invoice_filter(term)))
+
+    assert found("widg") == {invoice}
+    assert found("acme") == {invoice}
+    assert found("ein0004") == {invoice, other}
+    assert found("warehouse") == {other}
+
+    with django_capture_on_commit_callbacks(execute=True):
+        InvoiceLineItem.objects.filter(invoice=invoice).delete()
+    assert found("widg") == set()
+
+
+@pytest.mark.django_db
+def test_rebuild_indexes_rows_written_without_signals():
+    Customer.objects.bulk_create([Customer(name="Bulk Customer")])
+    assert search_index.search_customers("bulk") == []
+
+    search_index.get_backend().rebuild()
+    assert [c.name for c in search_index.search_customers("bulk")] == ["Bulk Customer"]
+
+
+@pytest.mark.django_db
+def test_backend_probe_runs_once_per_database(django_assert_num_queries):
+    search_index.get_backend()
+    with django_assert_num_queries(0):
+        assert search_index.get_backend().enabled
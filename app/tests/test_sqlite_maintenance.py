@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+import sqlite3
+
+import pytest
+
+from app.services.sqlite_maintenance import SQLiteMaintenance, run_maintenance
+
+
+def test_connections_open_with_tuned_pragmas(settings, tmp_path):
+    init_command = settings.DATABASES["default"]["OPTIONS"]["init_command"]
+    db = sqlite3.connect(tmp_path / "db.sqlite3")
+    for statement in init_command.split(";"):
+        db.execute(statement)
+
+    assert db.execute("PRAGMA journal_mode").fetchone() == ("wal",)
+    assert db.execute("PRAGMA synchronous").fetchone() == (1,)  # NORMAL
+    assert db.execute("PRAGMA cache_size").fetchone() == (-settings.SQLITE_CACHE_SIZE_KIB,)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_maintenance_thread_checkpoints_and_stops():
+    busy, _, _ = run_maintenance()
+    assert busy == 0
+
+    maintenance = SQLiteMaintenance(interval=0.01).start()
+    assert maintenance._thread.is_alive()
+    maintenance.stop()
+    assert maintenance._thread is None
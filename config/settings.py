@@ -61,19 +61,79 @@ WSGI_APPLICATION = "config.wsgi.application"
 ASGI_APPLICATION = "config.asgi.application"
 
 # Database configuration
-DATABASE_URL = os.getenv("DATABASE_URL", f"sqlite:///{BASE_DIR / 'db.sqlite3'}")
-
-# DATABASES = {
-#     "default": dj_database_url.parse(DATABASE_URL, conn_max_age=600, ssl_require=os.getenv("DB_SSL_REQUIRED", "False").lower() in {"1", "true", "yes"}),
-# }
+# SQLite by default; set DATABASE_URL (postgres://…) to run on PostgreSQL.
+# See docs/database-setup.md.
+SQLITE_PATH = BASE_DIR / "database" / "db.sqlite3"
+DATABASE_URL = os.getenv("DATABASE_URL") or f"sqlite:///{SQLITE_PATH}"
 
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / "database/db.sqlite3",
-    }
+    "default": dj_database_url.parse(
+        DATABASE_URL,
+        ssl_require=os.getenv("DB_SSL_REQUIRED", "False").lower() in {"1", "true", "yes"},
+    ),
 }
 
+# Tuning for the SQLite file shared by the desktop app, the embedded admin
+# server and sync runs.
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "30000"))
+SQLITE_CACHE_SIZE_KIB = int(os.getenv("SQLITE_CACHE_SIZE_KIB", "65536"))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024)))
+# Seconds between `PRAGMA optimize` / WAL checkpoint runs (0 disables them).
+SQLITE_MAINTENANCE_INTERVAL = int(os.getenv("SQLITE_MAINTENANCE_INTERVAL", "600"))
+
+if DATABASES["default"]["ENGINE"] == "django.db.backends.sqlite3":
+    DATABASES["default"]["OPTIONS"] = {
+        # Take the write lock when a transaction starts and wait for it,
+        # so concurrent writers (e.g. `replay_invoices --processes`) queue
+        # instead of failing with "database is locked".
+        "transaction_mode": "IMMEDIATE",
+        # sqlite3 applies this as the connection's busy_timeout.
+        "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000,
+        # Run on every new connection. WAL lets readers carry on while a
+        # writer holds the lock; with WAL, synchronous=NORMAL only risks the
+        # last transactions on power loss, never corruption.
+        "init_command": ";".join(
+            [
+                "PRAGMA journal_mode=WAL",
+                "PRAGMA synchronous=NORMAL",
+                f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KIB}",
+                f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}",
+                "PRAGMA temp_store=MEMORY",
+            ]
+        ),
+    }
+elif DATABASES["default"]["ENGINE"] == "django.db.backends.postgresql":
+    # Server-side cap on any one statement, in milliseconds (0 disables it).
+    DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000"))
+    DATABASES["default"].setdefault("OPTIONS", {})["options"] = f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"
+
+    if os.getenv("DB_POOL", "True").lower() in {"1", "true", "yes"}:
+        # One psycopg3 pool per worker process. With CONN_HEALTH_CHECKS
+        # Django passes the pool ConnectionPool.check_connection, so each
+        # connection is checked before being handed out. Pooling requires
+        # CONN_MAX_AGE = 0.
+        DATABASES["default"]["CONN_MAX_AGE"] = 0
+        DATABASES["default"]["CONN_HEALTH_CHECKS"] = True
+        DATABASES["default"]["OPTIONS"]["pool"] = {
+            "min_size": int(os.getenv("DB_POOL_MIN_SIZE", "2")),
+            "max_size": int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+            "timeout": float(os.getenv("DB_POOL_TIMEOUT", "10")),
+            "max_idle": 300,
+            "max_lifetime": 3600,
+        }
+    else:
+        # Behind an external pooler (e.g. PgBouncer): persistent connections,
+        # pinged before reuse.
+        DATABASES["default"]["CONN_MAX_AGE"] = int(os.getenv("DB_CONN_MAX_AGE", "600"))
+        DATABASES["default"]["CONN_HEALTH_CHECKS"] = True
+
+# JOFotara ingestion
+# Every fetched invoice payload is appended to a day-partitioned, gzip-compressed
+# NDJSON archive so the database can be rebuilt offline with `replay_invoices`.
+JOFOTARA_ARCHIVE_DIR = Path(os.getenv("JOFOTARA_ARCHIVE_DIR", BASE_DIR / "database" / "archive"))
+# Access tokens are cached here between runs so short syncs skip the login call.
+JOFOTARA_TOKEN_CACHE = Path(os.getenv("JOFOTARA_TOKEN_CACHE", BASE_DIR / "database" / "jofotara_token.json"))
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -134,17 +134,26 @@ def bootstrap_django() -> None:
 def run_server(port: int) -> None:
     from django.core.management import call_command
 
+    from app.services.sqlite_maintenance import SQLiteMaintenance
+
     logging.info("Running migrations...")
     call_command("migrate", interactive=False, verbosity=1)
     logging.info("Migrations completed.")
 
+    # The desktop app shares this database file; keep its WAL and planner
+    # statistics in shape for as long as the server runs.
+    maintenance = SQLiteMaintenance().start()
+
     logging.info("Starting Django development server on 127.0.0.1:%s", port)
-    call_command(
-        "runserver",
-        f"127.0.0.1:{port}",
-        use_reloader=False,
-        insecure_serving=True,
-    )
+    try:
+        call_command(
+            "runserver",
+            f"127.0.0.1:{port}",
+            use_reloader=False,
+            insecure_serving=True,
+        )
+    finally:
+        maintenance.stop()
 
 
 def main(argv: list[str] | None = None) -> None:
@@ -21,10 +21,16 @@ from PySide6.QtWidgets import QApplication
 
 # Import UI after Django is ready
 from ui.main_window import MainWindow
+from services.search_service import customer_index
+from app.services.sqlite_maintenance import SQLiteMaintenance
 
 # print("USING DB:", settings.DATABASES["default"]["NAME"])
 def main():
     app = QApplication(sys.argv)
+    # Load the customer search index while the window is being built.
+    customer_index.start()
+    maintenance = SQLiteMaintenance().start()
+    app.aboutToQuit.connect(maintenance.stop)
     window = MainWindow()
     window.show()
     sys.exit(app.exec())
@@ -0,0 +1,170 @@
+"""In-memory prefix index behind the desktop customer search bar."""
+from __future__ import annotations
+
+import logging
+import threading
+from bisect import bisect_left, insort
+from collections import namedtuple
+from functools import partial
+
+from django.db import connection, transaction
+from django.db.models import Count, Max
+from django.db.models.signals import post_delete, post_save
+
+from app.models import Customer
+from app.services.search_index import search_customers
+
+logger = logging.getLogger(__name__)
+
+IndexedCustomer = namedtuple("IndexedCustomer", ["id", "name", "phone_number"])
+
+
+def index_keys(name, phone_number=None, email=None) -> set[str]:
+    """
+    Casefolded strings a customer can be found by: the name from each word
+    onwards ("jane doe", "doe"), the phone number and the email.
+    """
+    words = (name or "").casefold().split()
+    keys = {" ".join(words[i:]) for i in range(len(words))}
+    keys.update(value.casefold() for value in (phone_number, email) if value)
+    return keys
+
+
+class CustomerPrefixIndex:
+    """
+    Sorted ``(key, customer_id)`` pairs, searched with ``bisect``.
+
+    ``start()`` loads every customer in a background thread and connects
+    signal handlers that apply saves and deletes once they commit. Until the
+    load finishes, ``search`` asks the database instead. Writes made by other
+    processes (the admin server) are picked up by ``reload_if_changed()``.
+    """
+
+    def __init__(self):
+        self._entries = []
+        # customer id -> (IndexedCustomer, its keys)
+        self._customers = {}
+        # Newest Customer.updated_at the index has seen.
+        self._latest = None
+        self._lock = threading.Lock()
+        self._thread = None
+        self._ready = threading.Event()
+        # Changes committed while a load runs, replayed on top of its result.
+        self._backlog = None
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def start(self, reload=False) -> None:
+        with self._lock:
+            if self._thread is not None and (self._thread.is_alive() or not reload):
+                return
+            self._backlog = []
+            self._thread = threading.Thread(target=self._load, name="customer-prefix-index", daemon=True)
+
+        post_save.connect(self._saved, sender=Customer, dispatch_uid="desktop_customer_prefix_index")
+        post_delete.connect(self._deleted, sender=Customer, dispatch_uid="desktop_customer_prefix_index")
+        self._thread.start()
+
+    def reload_if_changed(self) -> bool:
+        """
+        Reload in the background when customers were written without this
+        process's signals (another process, ``bulk_create``). Returns whether
+        a reload started.
+        """
+        if not self.ready:
+            return False
+        seen = Customer.objects.aggregate(latest=Max("updated_at"), count=Count("pk"))
+        with self._lock:
+            changed = seen["count"] != len(self._customers) or (
+                seen["latest"] is not None and (self._latest is None or seen["latest"] > self._latest)
+            )
+        if changed:
+            self.start(reload=True)
+        return changed
+
+    def wait(self, timeout=None) -> bool:
+        """Block until the first load has finished; ``False`` on timeout."""
+        return self._ready.wait(timeout)
+
+    def search(self, text, limit=10) -> list:
+        """Customers with a name word, phone or email starting with ``text``."""
+        prefix = " ".join(text.casefold().split())
+        if not prefix:
+            return []
+        if not self.ready:
+            return search_customers(text, limit)
+
+        found, seen = [], set()
+        with self._lock:
+            position = bisect_left(self._entries, (prefix,))
+            while position < len(self._entries) and len(found) < limit:
+                key, pk = self._entries[position]
+                if not key.startswith(prefix):
+                    break
+                if pk not in seen:
+                    seen.add(pk)
+                    found.append(self._customers[pk][0])
+                position += 1
+        return found
+
+    def _load(self) -> None:
+        customers, entries, latest = {}, [], None
+        try:
+            rows = Customer.objects.values_list("id", "name", "phone_number", "email", "updated_at")
+            for pk, name, phone_number, email, updated_at in rows.iterator(chunk_size=5000):
+                keys = index_keys(name, phone_number, email)
+                customers[pk] = (IndexedCustomer(pk, name, phone_number), keys)
+                entries.extend((key, pk) for key in keys)
+                latest = updated_at if latest is None else max(latest, updated_at)
+            entries.sort()
+        except Exception:
+            logger.exception("Could not load the customer search index")
+            with self._lock:
+                self._backlog = None
+            return
+        finally:
+            # This thread's connection is not reused; don't leave it open.
+            connection.close()
+
+        with self._lock:
+            self._entries, self._customers, self._latest = entries, customers, latest
+            for change in self._backlog:
+                change()
+            self._backlog = None
+        self._ready.set()
+
+    def _apply(self, change) -> None:
+        with self._lock:
+            if self._backlog is not None:
+                self._backlog.append(change)
+            change()
+
+    def _put(self, pk, name, phone_number, email, updated_at) -> None:
+        self._drop(pk)
+        if updated_at is not None and (self._latest is None or updated_at > self._latest):
+            self._latest = updated_at
+        keys = index_keys(name, phone_number, email)
+        self._customers[pk] = (IndexedCustomer(pk, name, phone_number), keys)
+        for key in keys:
+            insort(self._entries, (key, pk))
+
+    def _drop(self, pk) -> None:
+        _, keys = self._customers.pop(pk, (None, ()))
+        for key in keys:
+            position = bisect_left(self._entries, (key, pk))
+            if position < len(self._entries) and self._entries[position] == (key, pk):
+                del self._entries[position]
+
+    def _saved(self, sender, instance, using, **kwargs):
+        change = partial(
+            self._put, instance.pk, instance.name, instance.phone_number, instance.email, instance.updated_at
+        )
+        transaction.on_commit(partial(self._apply, change), using=using)
+
+    def _deleted(self, sender, instance, using, **kwargs):
+        transaction.on_commit(partial(self._apply, partial(self._drop, instance.pk)), using=using)
+
+
+customer_index = CustomerPrefixIndex()
@@ -1,8 +1,8 @@
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QLineEdit, QListWidget, QListWidgetItem
 )
-from PySide6.QtCore import Qt, Signal, QTimer
-from app.models import Customer
+from PySide6.QtCore import Qt, Signal, QTimer, QEvent
+from services.search_service import customer_index
 
 
 class CustomerSearchBar(QWidget):
@@ -14,6 +14,7 @@ class CustomerSearchBar(QWidget):
         self.search_input = QLineEdit()
         self.search_input.setPlaceholderText("Search customers…")
         self.search_input.textChanged.connect(self._delayed_search)
+        self.search_input.installEventFilter(self)
 
         self.suggestions = QListWidget()
         self.suggestions.hide()
@@ -29,6 +30,14 @@ class CustomerSearchBar(QWidget):
         self.timer.setSingleShot(True)
         self.timer.timeout.connect(self._search_db)
 
+        customer_index.start()
+
+    def eventFilter(self, watched, event):
+        # Pick up customers added or edited by the admin server meanwhile.
+        if watched is self.search_input and event.type() == QEvent.FocusIn:
+            customer_index.reload_if_changed()
+        return super().eventFilter(watched, event)
+
     def _delayed_search(self):
         self.timer.start(150)   # debounce: 150ms
 
@@ -40,7 +49,8 @@ class CustomerSearchBar(QWidget):
             self.suggestions.hide()
             return
 
-        matches = Customer.objects.filter(name__istartswith=text)[:10]
+        # Served from memory once the index has loaded; no DB round trip.
+        matches = customer_index.search(text, limit=10)
 
         for c in matches:
             item = QListWidgetItem(f"{c.name} — {c.phone_number or 'no phone'}")
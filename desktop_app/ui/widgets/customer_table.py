@@ -62,8 +62,7 @@ class CustomerTable(QTableWidget):
             self.setItem(row, 2, phone_item)
 
             # Invoice count
-            invoice_count = c.invoices.count()
-            invoice_item = QTableWidgetItem(str(invoice_count))
+            invoice_item = QTableWidgetItem(str(c.invoice_count))
             invoice_item.setTextAlignment(Qt.AlignCenter)
             self.setItem(row, 3, invoice_item)
 